@@ -1,8 +1,6 @@
 import os
+import re
 import sys
-import pkg_resources
-import subprocess
-import shutil
 
 # ==========================================================
 # CONFIGURACIÓN
@@ -14,11 +12,53 @@ DIST_PATH = "dist"
 BUILD_PATH = "build"
 SPEC_PATH = "spec"
 
-EXCLUSIONES = [
+# Raíz del proyecto (el script se ejecuta desde ella); se resuelve una sola vez
+BASE_DIR = os.getcwd()
+
+# Modo de empaquetado: "onedir" (arranque más rápido, por defecto) u
+# "onefile" (un único .exe comprimido, menor tamaño de distribución)
+MODO = os.environ.get("MATRIXMAE_MODE", "onedir")
+if MODO not in ("onedir", "onefile"):
+    print(f"⚠️ MATRIXMAE_MODE inválido: '{MODO}'. Usando 'onedir'.")
+    MODO = "onedir"
+
+# Reconstrucción completa (borra dist/build/spec y pasa --clean a PyInstaller).
+# Por defecto solo se limpia si alguna fuente cambió desde el último análisis.
+FULL_CLEAN = "--full-clean" in sys.argv
+
+# Regenerar el .spec aunque exista uno de una compilación anterior
+REGENERAR_SPEC = FULL_CLEAN or "--regen-spec" in sys.argv
+SPEC_FILE = os.path.join(SPEC_PATH, NOMBRE_EXE.replace(".exe", "") + ".spec")
+# Huella del comando que generó el .spec (modo, exclusiones, hidden imports...):
+# si el comando actual difiere, el .spec guardado ya no le corresponde
+HUELLA_SPEC = SPEC_FILE + ".sha1"
+
+# Listado de librerías instaladas en la validación del entorno (opcional)
+LISTAR_PAQUETES = bool(os.environ.get("MATRIXMAE_LIST_PKGS")) or "--list-pkgs" in sys.argv
+
+EXCLUSIONES = frozenset({
     "pip", "wheel", "setuptools", "pkg_resources",
     "distutils", "ensurepip", "test", "tkinter.test",
-    "pytest", "pytest_cov", "coverage"
-]
+    "pytest", "pytest_cov", "coverage",
+    # Submódulos de Qt que la interfaz no utiliza
+    "PyQt5.QtQml", "PyQt5.QtQuick", "PyQt5.QtQuickWidgets",
+    "PyQt5.QtDesigner", "PyQt5.QtHelp", "PyQt5.QtNetwork",
+    "PyQt5.QtDBus", "PyQt5.QtTest", "PyQt5.QtWebEngineWidgets",
+    # Librerías pesadas que la aplicación no importa
+    "numpy", "PIL", "scipy", "matplotlib", "IPython",
+    # Tcl/Tk (la interfaz es PyQt5) y módulos de depuración/test de la stdlib
+    "tkinter", "_tkinter", "turtle", "turtledemo", "idlelib",
+    "unittest", "doctest", "pdb", "lib2to3", "xmlrpc",
+})
+
+# Huella de dependencias guardada junto a la caché de PyInstaller: mientras
+# requirements.txt no cambie, las capas de Qt y pywin32 ya recolectadas en
+# build/ se reutilizan en lugar de volver a copiarse
+ARCHIVO_DEPENDENCIAS = "requirements.txt"
+HUELLA_DEPENDENCIAS = os.path.join(BUILD_PATH, "deps.sha1")
+
+# Líneas de nivel INFO de PyInstaller (p. ej. "1234 INFO: ...")
+LINEA_INFO = re.compile(r"^\d+ INFO: ")
 
 # ==========================================================
 # VALIDAR ENTORNO VIRTUAL
@@ -36,12 +76,20 @@ def validar_entorno_virtual():
 
     print(f"✅ Entorno virtual detectado: {sys.prefix}\n")
 
-    paquetes = sorted([(pkg.key, pkg.version) for pkg in pkg_resources.working_set])
-    print(f"📦 Librerías instaladas ({len(paquetes)}):")
-    for nombre, version in paquetes:
-        flag = "🧹 (excluir)" if nombre in EXCLUSIONES else "✅"
-        print(f"   {flag} {nombre:<20} {version}")
-    print("\n")
+    # El listado de paquetes recorre todo site-packages: solo bajo demanda
+    if LISTAR_PAQUETES:
+        from importlib.metadata import distributions
+        # d.metadata (y d.version) vuelven a leer el archivo METADATA en cada
+        # acceso: leerlo una vez por distribución
+        paquetes = sorted({
+            (nombre.lower(), md["Version"])
+            for md in (d.metadata for d in distributions()) if (nombre := md["Name"])
+        })
+        print(f"📦 Librerías instaladas ({len(paquetes)}):")
+        for nombre, version in paquetes:
+            flag = "🧹 (excluir)" if nombre in EXCLUSIONES else "✅"
+            print(f"   {flag} {nombre:<20} {version}")
+        print("\n")
 
 # ==========================================================
 # CONFIRMACIÓN MANUAL
@@ -61,7 +109,82 @@ def confirmar_ejecucion():
 # ==========================================================
 # LIMPIAR BUILDS ANTERIORES
 # ==========================================================
+def iter_fuentes():
+    yield os.path.join(BASE_DIR, MAIN_SCRIPT)
+    for raiz in ("legacy", "config", "ui"):
+        for carpeta, _, archivos in os.walk(os.path.join(BASE_DIR, raiz)):
+            for archivo in archivos:
+                if archivo.endswith((".py", ".json", ".ico")):
+                    yield os.path.join(carpeta, archivo)
+
+def hash_dependencias():
+    import hashlib
+    try:
+        with open(ARCHIVO_DEPENDENCIAS, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+    except OSError:
+        return ""
+
+def guardar_hash_dependencias():
+    try:
+        with open(HUELLA_DEPENDENCIAS, "w", encoding="utf-8") as f:
+            f.write(hash_dependencias())
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la huella de dependencias: {e}")
+
+def hash_comando(comando):
+    import hashlib
+    # --clean solo afecta a la caché, no al contenido del .spec
+    return hashlib.sha1(
+        "\n".join(a for a in comando if a != "--clean").encode("utf-8")
+    ).hexdigest()[:12]
+
+def spec_vigente(comando):
+    if REGENERAR_SPEC or not os.path.exists(SPEC_FILE):
+        return False
+    try:
+        with open(HUELLA_SPEC, encoding="utf-8") as f:
+            return f.read().strip() == hash_comando(comando)
+    except OSError:
+        return False
+
+def guardar_hash_spec(comando):
+    try:
+        with open(HUELLA_SPEC, "w", encoding="utf-8") as f:
+            f.write(hash_comando(comando))
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la huella del .spec: {e}")
+
+def builds_desactualizados():
+    # La caché se considera vigente si las dependencias no cambiaron y ninguna
+    # fuente es más reciente que el último análisis de PyInstaller
+    # (build/<nombre>/Analysis-00.toc)
+    try:
+        with open(HUELLA_DEPENDENCIAS, encoding="utf-8") as f:
+            if f.read().strip() != hash_dependencias():
+                return True
+    except OSError:
+        return True
+
+    try:
+        cache_stamp = os.path.getmtime(
+            os.path.join(BUILD_PATH, NOMBRE_EXE.replace(".exe", ""), "Analysis-00.toc")
+        )
+    except OSError:
+        return True
+
+    newest_src = max(
+        (os.path.getmtime(p) for p in iter_fuentes() if os.path.exists(p)),
+        default=0.0
+    )
+    return newest_src > cache_stamp
+
 def limpiar_builds():
+    if not FULL_CLEAN and not builds_desactualizados():
+        return
+
+    import shutil
+
     for carpeta in [DIST_PATH, BUILD_PATH, SPEC_PATH]:
         if os.path.exists(carpeta):
             try:
@@ -74,16 +197,25 @@ def limpiar_builds():
 # ==========================================================
 # CONSTRUIR COMANDO PYINSTALLER
 # ==========================================================
+def _hidden_imports_from(pkg_dir, prefijo=""):
+    import pkgutil
+    for m in pkgutil.iter_modules([pkg_dir], prefix=prefijo):
+        yield m.name
+
 def construir_comando():
-    base_dir = os.getcwd()
-    legacy_dir = os.path.join(base_dir, "legacy") # ⭐ Definir ruta a legacy
+    legacy_dir = os.path.join(BASE_DIR, "legacy") # ⭐ Definir ruta a legacy
 
     comando = [
         sys.executable, "-m", "PyInstaller",
-        "--onedir",
+        f"--{MODO}",
         "--windowed",
-        "--clean",
+        # Sin tty (salida por PIPE) PyInstaller no puede preguntar antes de
+        # sobrescribir dist/ conservado por la caché: aceptar sin confirmar
+        "--noconfirm",
         "--log-level", "WARN",
+        # Bytecode sin asserts ni docstrings (PyInstaller >= 6.0): PYZ más
+        # pequeño y menos bytes que descomprimir al arrancar
+        "--optimize", "2",
         "--distpath", DIST_PATH,
         "--workpath", BUILD_PATH,
         "--specpath", SPEC_PATH,
@@ -92,7 +224,7 @@ def construir_comando():
         # ⭐ INICIO DE LA CORRECCIÓN ⭐
         
         # 1. Añadir el directorio RAÍZ (para encontrar 'config' y 'ui')
-        "--paths", base_dir,
+        "--paths", BASE_DIR,
         
         # 2. Añadir el directorio LEGACY (para encontrar 'extractor_adapter', etc.)
         "--paths", legacy_dir,
@@ -111,8 +243,23 @@ def construir_comando():
         "--hidden-import=PyQt5.QtWidgets",
     ]
 
+    # Módulos propios descubiertos automáticamente (imports dinámicos incluidos).
+    # Los de legacy/ se importan como módulos de primer nivel gracias a --paths.
+    script_principal = os.path.splitext(os.path.basename(MAIN_SCRIPT))[0]
+    for mod in _hidden_imports_from(legacy_dir):
+        if mod != script_principal:
+            comando.append(f"--hidden-import={mod}")
+    for paquete in ("config", "ui"):
+        for mod in _hidden_imports_from(os.path.join(BASE_DIR, paquete), paquete + "."):
+            comando.append(f"--hidden-import={mod}")
+
+    # Solo forzar re-análisis completo cuando se solicita explícitamente
+    if FULL_CLEAN:
+        comando.append("--clean")
+
     # Excluir módulos innecesarios
-    for excl in EXCLUSIONES:
+    # Orden estable: el comando (y el .spec generado) no cambia entre ejecuciones
+    for excl in sorted(EXCLUSIONES):
         comando += ["--exclude-module", excl]
 
     # ======================================================
@@ -120,14 +267,14 @@ def construir_comando():
     # ======================================================
     
     # 1. Archivo config.json (DATOS)
-    config_json_path = os.path.join(base_dir, "config", "config.json")
+    config_json_path = os.path.join(BASE_DIR, "config", "config.json")
     if os.path.exists(config_json_path):
         comando += ["--add-data", f"{config_json_path};config"]
     else:
         print("⚠️ Advertencia: no se encontró 'config/config.json'")
 
     # 2. Icono de la aplicación (DATOS Y RECURSO EXE)
-    ico_path = os.path.join(base_dir, "config", "ico.ico")
+    ico_path = os.path.join(BASE_DIR, "config", "ico.ico")
     if os.path.exists(ico_path):
         comando += ["--icon", ico_path]
         comando += ["--add-data", f"{ico_path};config"]
@@ -135,16 +282,17 @@ def construir_comando():
         print("⚠️ Advertencia: no se encontró 'config/ico.ico'")
 
     # 3. Crear carpeta logs vacía en el bundle (LÓGICA ORIGINAL)
+    # Solo se escribe la primera vez: conservar su mtime mantiene estable la caché
     logs_placeholder = os.path.join(legacy_dir, "logs", ".keep")
+    os.makedirs(os.path.dirname(logs_placeholder), exist_ok=True)
     if not os.path.exists(logs_placeholder):
-        os.makedirs(os.path.dirname(logs_placeholder), exist_ok=True)
         with open(logs_placeholder, 'w') as f:
             f.write("# Placeholder para mantener la carpeta logs\n")
     
     comando += ["--add-data", f"{logs_placeholder};legacy/logs"]
 
     # Script principal con ruta completa
-    main_path = os.path.join(base_dir, MAIN_SCRIPT)
+    main_path = os.path.join(BASE_DIR, MAIN_SCRIPT)
     comando.append(main_path)
     
     return comando
@@ -154,26 +302,61 @@ def construir_comando():
 # ==========================================================
 def generar_exe():
     print("=" * 60)
-    print("🚀 INICIANDO GENERACIÓN DEL EJECUTABLE (MODO ONEDIR)")
+    print(f"🚀 INICIANDO GENERACIÓN DEL EJECUTABLE (MODO {MODO.upper()})")
     print("=" * 60)
 
-    verificar_main()
-    verificar_estructura()
+    # Importaciones diferidas: no se pagan si el usuario cancela en la confirmación
+    import shutil
+    import subprocess
+
     limpiar_builds()
 
-    cmd = construir_comando()
+    # Con un .spec previo generado por este mismo comando PyInstaller se invoca
+    # directamente sobre él y se omite la traducción de argumentos a spec
+    comando = construir_comando()
+    if spec_vigente(comando):
+        cmd = [
+            sys.executable, "-m", "PyInstaller",
+            "--noconfirm",
+            "--log-level", "WARN",
+            "--distpath", DIST_PATH,
+            "--workpath", BUILD_PATH,
+            SPEC_FILE,
+        ]
+    else:
+        cmd = comando
     print("⚙️  Comando PyInstaller:")
     print("   ", " ".join(cmd))
     print("\n🔨 Compilando, por favor espera...\n")
 
-    result = subprocess.run(cmd)
+    # Salida de PyInstaller canalizada por el stdout (con buffer) del proceso
+    # padre; se descartan las líneas INFO que pudieran colarse
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            bufsize=1, text=True, encoding="utf-8", errors="replace")
+    for line in proc.stdout:
+        if LINEA_INFO.match(line):
+            continue
+        sys.stdout.write(line)
+    result_code = proc.wait()
 
     print("=" * 60)
-    if result.returncode == 0:
-        carpeta_exe = os.path.join(DIST_PATH, NOMBRE_EXE.replace(".exe", ""))
+    if result_code == 0:
         print(f"✅ Generación completada correctamente.")
-        print(f"📂 Carpeta de salida: {carpeta_exe}")
-        print(f"📦 Ejecutable: {os.path.join(carpeta_exe, NOMBRE_EXE)}")
+        guardar_hash_dependencias()
+        if cmd is comando:
+            guardar_hash_spec(comando)
+        if MODO == "onefile":
+            print(f"📦 Ejecutable: {os.path.join(DIST_PATH, NOMBRE_EXE)}")
+        else:
+            carpeta_exe = os.path.join(DIST_PATH, NOMBRE_EXE.replace(".exe", ""))
+
+            # Los .pyc sueltos duplican lo que ya está dentro del PYZ del bundle
+            import pathlib
+            for pyc_dir in pathlib.Path(carpeta_exe).rglob("__pycache__"):
+                shutil.rmtree(pyc_dir, ignore_errors=True)
+
+            print(f"📂 Carpeta de salida: {carpeta_exe}")
+            print(f"📦 Ejecutable: {os.path.join(carpeta_exe, NOMBRE_EXE)}")
     else:
         print("❌ Error: PyInstaller no se ejecutó correctamente.")
         print("💡 Revisa los mensajes de error arriba para más detalles.")
@@ -183,7 +366,7 @@ def generar_exe():
 # VERIFICAR SCRIPT PRINCIPAL
 # ==========================================================
 def verificar_main():
-    ruta = os.path.join(os.getcwd(), MAIN_SCRIPT)
+    ruta = os.path.join(BASE_DIR, MAIN_SCRIPT)
     if not os.path.isfile(ruta):
         print(f"❌ ERROR: No se encontró '{MAIN_SCRIPT}' en el directorio actual.")
         sys.exit(1)
@@ -196,42 +379,42 @@ def verificar_main():
 def verificar_estructura():
     print("📁 Verificando estructura del proyecto:")
     
-    carpetas_requeridas = [
-        "config",
-        "legacy", 
-        "ui"
-    ]
-    
-    archivos_requeridos = [
-        "config/config_manager.py",
-        "config/config.json",
-        "config/ico.ico",
-        "ui/estilos.py",
-        "legacy/backend_base.py",
-        "legacy/backend_extractor.py",
-        "legacy/backend_clasificador.py",
-        "legacy/extractor_adapter.py",
-        "legacy/clasificador_adapter.py"
-    ]
+    # Archivos requeridos agrupados por carpeta: una lectura de directorio
+    # por carpeta en lugar de un stat() por archivo
+    archivos_requeridos = {
+        "config": ["config_manager.py", "config.json", "ico.ico"],
+        "legacy": [
+            "backend_base.py",
+            "backend_extractor.py",
+            "backend_clasificador.py",
+            "adapter_base.py",
+            "extractor_adapter.py",
+            "clasificador_adapter.py"
+        ],
+        "ui": ["estilos.py"]
+    }
     
     todo_ok = True
     
-    for carpeta in carpetas_requeridas:
-        if os.path.exists(carpeta):
-            print(f"   ✅ Carpeta '{carpeta}' encontrada")
-        else:
-            print(f"   ❌ Carpeta '{carpeta}' NO encontrada")
-            todo_ok = False
-    
     # ⭐ NOTA: He vuelto a poner los archivos .py aquí para verificar
     # que existen, aunque ahora sabemos que se compilan
     # gracias a --paths y no a --add-data
-    for archivo in archivos_requeridos:
-        if os.path.exists(archivo):
-            print(f"   ✅ Archivo '{archivo}' encontrado")
-        else:
-            print(f"   ⚠️ Archivo '{archivo}' NO encontrado")
-            # No marcamos como error crítico, solo advertencia
+    for carpeta, archivos in archivos_requeridos.items():
+        try:
+            with os.scandir(os.path.join(BASE_DIR, carpeta)) as it:
+                presentes = {e.name for e in it}
+        except (FileNotFoundError, NotADirectoryError):
+            print(f"   ❌ Carpeta '{carpeta}' NO encontrada")
+            todo_ok = False
+            continue
+        
+        print(f"   ✅ Carpeta '{carpeta}' encontrada")
+        for archivo in archivos:
+            if archivo in presentes:
+                print(f"   ✅ Archivo '{carpeta}/{archivo}' encontrado")
+            else:
+                # No marcamos como error crítico, solo advertencia
+                print(f"   ⚠️ Archivo '{carpeta}/{archivo}' NO encontrado")
     
     if not todo_ok:
         print("\n❌ ERROR: Estructura del proyecto incompleta.")
@@ -248,8 +431,11 @@ if __name__ == "__main__":
     print("   GENERADOR DE EJECUTABLE - GESTIÓN DE CORREOS OUTLOOK")
     print("=" * 60 + "\n")
     
-    validar_entorno_virtual()
+    # Confirmar primero: abortar con "N" no debe pagar ninguna validación
     confirmar_ejecucion()
+    verificar_main()
+    verificar_estructura()
+    validar_entorno_virtual()
     generar_exe()
     
     print("\n🎉 Proceso completado. ¡Gracias por usar el generador!")
\ No newline at end of file
@@ -46,6 +46,10 @@ class ConfigManager:
         self.config_dir.mkdir(exist_ok=True)
         
         self._config = self._load_config()
+        # Valores derivados, calculados la primera vez que se piden
+        self._tema_cache = None
+        self._icon_cache = None
+        self._icon_buscado = False
         self._initialized = True
     
     @staticmethod
@@ -186,6 +190,8 @@ class ConfigManager:
         """
         if config is None:
             config = self._config
+        # El tema guardado puede haber cambiado: se relee en el próximo get_tema
+        self._tema_cache = None
         
         try:
             config["ultima_actualizacion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -202,9 +208,25 @@ class ConfigManager:
         
         Returns:
             Path del icono si existe, None en caso contrario
+            
+        La búsqueda en disco se hace una sola vez (se repite tras reload).
         """
+        if not self._icon_buscado:
+            self._icon_cache = self._buscar_icono()
+            self._icon_buscado = True
+        return self._icon_cache
+    
+    def _buscar_icono(self) -> Path | None:
+        """Busca el icono junto al ejecutable o en el bundle de PyInstaller"""
         if self.icon_path.exists():
             return self.icon_path
+
+        # En modo onefile los datos empaquetados se extraen en sys._MEIPASS
+        bundle_dir = getattr(sys, '_MEIPASS', None)
+        if bundle_dir:
+            icon_bundle = Path(bundle_dir) / self.CONFIG_DIR_NAME / self.ICON_FILENAME
+            if icon_bundle.exists():
+                return icon_bundle
         return None
     
     def get_tema(self) -> str:
@@ -214,7 +236,9 @@ class ConfigManager:
         Returns:
             'light' o 'dark'
         """
-        return self.get('tema', 'light')
+        if self._tema_cache is None:
+            self._tema_cache = self.get('tema', 'light')
+        return self._tema_cache
     
     def set_tema(self, tema: str):
         """
@@ -234,6 +258,8 @@ class ConfigManager:
         Útil si el archivo fue modificado externamente.
         """
         self._config = self._load_config()
+        self._tema_cache = None
+        self._icon_buscado = False
     
     def __repr__(self):
         return f"ConfigManager(config_path='{self.config_path}')"
@@ -0,0 +1,53 @@
+"""
+Piezas comunes de los workers PyQt5 (ExtractorWorker y ClasificadorWorker):
+iconos, niveles visibles, textos de estado y marco del resumen final.
+"""
+
+from backend_base import NivelMensaje, EstadoProceso
+
+
+# Icono de cada nivel de mensaje
+ICONOS = {
+    NivelMensaje.DEBUG: "🔍",
+    NivelMensaje.INFO: "ℹ️",
+    NivelMensaje.SUCCESS: "✅",
+    NivelMensaje.WARNING: "⚠️",
+    NivelMensaje.ERROR: "❌"
+}
+
+# Niveles que se muestran por defecto (DEBUG se descarta al recibirlo)
+NIVELES_VISIBLES_POR_DEFECTO = frozenset({
+    NivelMensaje.INFO,
+    NivelMensaje.SUCCESS,
+    NivelMensaje.WARNING,
+    NivelMensaje.ERROR
+})
+
+# Texto mostrado para cada cambio de estado (cada backend usa los suyos)
+MENSAJES_ESTADO = {
+    EstadoProceso.DETENIDO: "⏹️ Proceso detenido",
+    EstadoProceso.INICIANDO: "🚀 Iniciando proceso...",
+    EstadoProceso.FILTRANDO: "🔍 Filtrando correos en Outlook...",
+    EstadoProceso.PROCESANDO: "📦 Procesando adjuntos...",
+    EstadoProceso.CLASIFICANDO: "📂 Clasificando documentos...",
+    EstadoProceso.PAUSADO: "⏸️ Proceso pausado",
+    EstadoProceso.COMPLETADO: "✅ Proceso completado exitosamente",
+    EstadoProceso.ERROR: "❌ Error en el proceso",
+    EstadoProceso.CANCELADO: "🛑 Proceso cancelado"
+}
+
+# Marco del resumen final; cada worker pone entre ambos sus líneas de estadísticas
+ENCABEZADO_RESUMEN = (
+    "\n" + "=" * 60 + "\n"
+    "🎉 PROCESO COMPLETADO\n"
+    + "=" * 60 + "\n"
+    "📊 Estadísticas:\n\n"
+)
+PIE_RESUMEN = "   ⏱️ Tiempo total: {tiempo}\n\n" + "=" * 60
+
+
+def formatear_duracion(segundos: float) -> str:
+    """Duración como '1min 5.0s' o '5.0s'"""
+    if segundos >= 60:
+        return f"{int(segundos // 60)}min {segundos % 60:.1f}s"
+    return f"{segundos:.1f}s"
@@ -7,13 +7,15 @@ FASE 2 - Base Común
 
 import logging
 import os
+import stat
+import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from threading import Event
-from typing import Optional, Callable, Any
+from threading import Event, Lock
+from typing import Optional, Callable, Any, IO
 
 
 # ========================================
@@ -50,7 +52,7 @@ class EstadoProceso(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class EstadisticasBase:
     """Estadísticas base del proceso"""
     tiempo_inicio: Optional[datetime] = None
@@ -100,6 +102,10 @@ class BackendBase(ABC):
         self.estado_actual = EstadoProceso.DETENIDO
         self.fase_actual = FaseProceso.INICIAL
         self.log_file: Optional[Path] = None
+        self._log_fp: Optional[IO] = None
+        # Los backends pueden registrar desde varios hilos (descarga,
+        # clasificación): las escrituras al log se serializan
+        self._lock_log = Lock()
         
         # Control de pausa/cancelación
         self._event_pausa = Event()
@@ -182,8 +188,11 @@ class BackendBase(ABC):
             actual: Cantidad actual procesada
             total: Cantidad total a procesar
         """
-        porcentaje = (actual / total * 100) if total > 0 else 0.0
-        self.callback_progreso(actual, total, porcentaje)
+        # Sin total no hay progreso que mostrar: el callback solo se invoca
+        # con total > 0 y no necesita comprobarlo en cada llamada
+        if total <= 0:
+            return
+        self.callback_progreso(actual, total, actual / total * 100)
     
     def _cambiar_estado(self, nuevo_estado: EstadoProceso):
         """
@@ -265,13 +274,28 @@ class BackendBase(ABC):
     
     def _verificar_pausa(self):
         """Espera si el proceso está pausado"""
-        self._event_pausa.wait()
+        # is_set solo lee el flag; wait() adquiere el lock del Event en cada
+        # llamada aunque no haya pausa, y esto se llama por cada elemento
+        if not self._event_pausa.is_set():
+            self._event_pausa.wait()
     
     def _resetear_control(self):
         """Resetea los eventos de control para un nuevo proceso"""
         self._event_cancelar.clear()
         self._event_pausa.set()
     
+    def resetear(self):
+        """
+        Devuelve el backend al estado inicial para reutilizarlo en otro
+        proceso. Conserva los callbacks; las subclases limpian además sus
+        estadísticas.
+        """
+        self._cerrar_log()
+        self.log_file = None
+        self._resetear_control()
+        self.estado_actual = EstadoProceso.DETENIDO
+        self.fase_actual = FaseProceso.INICIAL
+    
     # ========================================
     # UTILIDADES COMUNES
     # ========================================
@@ -328,7 +352,8 @@ class BackendBase(ABC):
             )
             return False
     
-    def _verificar_permisos_escritura(self, ruta: Path) -> bool:
+    @staticmethod
+    def _verificar_permisos_escritura(ruta: Path) -> bool:
         """
         Verifica permisos de escritura en una ruta.
         
@@ -357,14 +382,24 @@ class BackendBase(ABC):
         hora_str = ahora.strftime("%H.%M.%S")
         nombre_log = f"{prefijo}_fecha({fecha_str})_hora({hora_str}).log"
         
+        self._cerrar_log()
         self.log_file = Path(carpeta_destino) / nombre_log
         
-        # Escribir encabezado
-        self._escribir_log("=" * 80)
-        self._escribir_log(f"LOG DE PROCESAMIENTO - {self.__class__.__name__.upper()}")
-        self._escribir_log("=" * 80)
-        self._escribir_log(f"Inicio: {ahora.strftime('%Y-%m-%d %H:%M:%S')}")
-        self._escribir_log("")
+        # Handle persistente durante el proceso; con buffer de línea cada
+        # mensaje queda en disco sin reabrir el archivo
+        try:
+            self._log_fp = open(self.log_file, 'a', encoding='utf-8', buffering=1)
+        except Exception as e:
+            self.logger.error(f"Error al abrir log: {e}")
+        
+        # Escribir encabezado (una sola escritura)
+        self._escribir_log("\n".join([
+            "=" * 80,
+            f"LOG DE PROCESAMIENTO - {self.__class__.__name__.upper()}",
+            "=" * 80,
+            f"Inicio: {ahora.strftime('%Y-%m-%d %H:%M:%S')}",
+            "",
+        ]))
     
     def _escribir_log(self, mensaje: str):
         """
@@ -375,12 +410,28 @@ class BackendBase(ABC):
         """
         if self.log_file:
             try:
-                # Crear el archivo si no existe (modo 'a' crea automáticamente)
-                with open(self.log_file, 'a', encoding='utf-8') as f:
-                    f.write(f"{mensaje}\n")
+                with self._lock_log:
+                    if self._log_fp is not None:
+                        self._log_fp.write(f"{mensaje}\n")
+                    else:
+                        # Log ya cerrado: mensajes tardíos se agregan al final
+                        with open(self.log_file, 'a', encoding='utf-8') as f:
+                            f.write(f"{mensaje}\n")
             except Exception as e:
                 self.logger.error(f"Error al escribir log: {e}")
     
+    def _cerrar_log(self):
+        """
+        Cierra el handle persistente del archivo de log, si está abierto.
+        """
+        with self._lock_log:
+            if self._log_fp is not None:
+                try:
+                    self._log_fp.close()
+                except Exception as e:
+                    self.logger.error(f"Error al cerrar log: {e}")
+                self._log_fp = None
+    
     def _finalizar_log_archivo(self, estadisticas: dict):
         """
         Finaliza el archivo de log con estadísticas.
@@ -391,15 +442,13 @@ class BackendBase(ABC):
         if not self.log_file:
             return
         
-        self._escribir_log("")
-        self._escribir_log("=" * 80)
-        self._escribir_log("RESUMEN FINAL")
-        self._escribir_log("=" * 80)
+        # Se acumula el resumen y se escribe de una vez
+        lineas = ["", "=" * 80, "RESUMEN FINAL", "=" * 80]
         
         # Escribir estadísticas
         for clave, valor in estadisticas.items():
             if clave != 'tiempo_total':
-                self._escribir_log(f"{clave}: {valor}")
+                lineas.append(f"{clave}: {valor}")
         
         # Tiempo total
         tiempo_total = estadisticas.get('tiempo_total', 0)
@@ -410,25 +459,32 @@ class BackendBase(ABC):
             segundos = tiempo_total % 60
             tiempo_str = f"{minutos}min {segundos:.1f}s"
         
-        self._escribir_log(f"Tiempo total: {tiempo_str}")
+        lineas.append(f"Tiempo total: {tiempo_str}")
         
         # Estado final
         if self.estado_actual == EstadoProceso.COMPLETADO:
-            self._escribir_log("Estado: ✅ Completado exitosamente")
+            lineas.append("Estado: ✅ Completado exitosamente")
         elif self.estado_actual == EstadoProceso.CANCELADO:
-            self._escribir_log("Estado: 🛑 Cancelado")
+            lineas.append("Estado: 🛑 Cancelado")
         elif self.estado_actual == EstadoProceso.ERROR:
-            self._escribir_log("Estado: ❌ Error")
+            lineas.append("Estado: ❌ Error")
         
-        self._escribir_log("=" * 80)
-        self._escribir_log(f"Log guardado en: {self.log_file.absolute()}")
-        self._escribir_log("=" * 80)
+        lineas.append("=" * 80)
+        lineas.append(f"Log guardado en: {self.log_file.absolute()}")
+        lineas.append("=" * 80)
+        
+        self._escribir_log("\n".join(lineas))
+        self._cerrar_log()
     
     # ========================================
     # VALIDACIÓN BASE
     # ========================================
     
-    def _validar_carpeta_existe(self, carpeta: str, nombre: str = "carpeta") -> tuple[bool, str]:
+    # Métodos estáticos: los validadores del frontend los usan sin instanciar
+    # el backend
+    
+    @staticmethod
+    def _validar_carpeta_existe(carpeta: str, nombre: str = "carpeta") -> tuple[bool, str]:
         """
         Valida que una carpeta existe.
         
@@ -442,15 +498,19 @@ class BackendBase(ABC):
         if not carpeta or not carpeta.strip():
             return False, f"Debe seleccionar una {nombre}"
         
-        if not os.path.exists(carpeta):
+        # Un único stat resuelve existencia y tipo
+        try:
+            modo = os.stat(carpeta).st_mode
+        except (OSError, ValueError):
             return False, f"La {nombre} no existe"
         
-        if not os.path.isdir(carpeta):
+        if not stat.S_ISDIR(modo):
             return False, f"La ruta no es una {nombre} válida"
         
         return True, ""
     
-    def _validar_rango_fechas(self, fecha_inicio: datetime, fecha_fin: datetime) -> tuple[bool, str]:
+    @staticmethod
+    def _validar_rango_fechas(fecha_inicio: datetime, fecha_fin: datetime) -> tuple[bool, str]:
         """
         Valida un rango de fechas.
         
@@ -501,15 +561,14 @@ class BackendBase(ABC):
             self._resetear_control()
             self._cambiar_estado(EstadoProceso.INICIANDO)
             
-            # Inicializar tiempo
-            tiempo_inicio = datetime.now()
+            # Inicializar tiempo (reloj monotónico: solo interesa la duración)
+            tiempo_inicio = time.perf_counter()
             
             # Procesamiento principal (implementado por subclase)
             resultado = self._procesar_principal(*args, **kwargs)
             
             # Finalizar
-            tiempo_fin = datetime.now()
-            resultado['tiempo_total'] = (tiempo_fin - tiempo_inicio).total_seconds()
+            resultado['tiempo_total'] = time.perf_counter() - tiempo_inicio
             
             if not self._event_cancelar.is_set():
                 self._cambiar_estado(EstadoProceso.COMPLETADO)
@@ -528,6 +587,9 @@ class BackendBase(ABC):
                 f"Error durante el proceso: {str(e)}"
             )
             raise
+            
+        finally:
+            self._cerrar_log()
     
     # ========================================
     # REPRESENTACIÓN
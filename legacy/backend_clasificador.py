@@ -4,8 +4,13 @@ Clasificador de documentos según estado de firma.
 FASE 2 - Hereda de BackendBase
 """
 
+import errno
 import os
+import re
 import shutil
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from dataclasses import dataclass
 from datetime import datetime
@@ -44,11 +49,37 @@ class FaseProceso(Enum):
     FINALIZACION = "finalizacion"
 
 
+# ========================================
+# PATRONES DE CLASIFICACIÓN
+# ========================================
+
+# "sin firmar", "sin_firmar", "sinfirmar", "not signed", "not_signed", "notsigned"
+# Se aplican sobre el nombre en minúsculas: re.IGNORECASE es ~3x más lento
+# Las reglas son fijas: se compilan al importar y se enlazan sus métodos
+# search para no resolver el atributo en cada archivo
+_buscar_sin_firmar = re.compile(r"sin[ _]?firmar|not[ _]?signed").search
+_buscar_firmado = re.compile(r"firmado|signed").search
+
+# Resultado de clasificación -> contador de EstadisticasClasificacion
+_CAMPO_RESULTADO = {
+    'firmado': 'firmados',
+    'sin_firmar': 'sin_firmar',
+    'omitido': 'omitidos',
+    'error': 'errores',
+}
+
+# rename relativo a descriptores de carpeta (POSIX): el kernel no vuelve a
+# resolver la ruta completa en cada archivo. En Windows no está disponible.
+# Se comprueba os.rename porque es la función que se llama con dir_fd
+# (os.supports_dir_fd no incluye os.replace aunque comparta renameat)
+_RENAME_CON_DIR_FD = os.rename in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+
 # ========================================
 # ESTADÍSTICAS ESPECÍFICAS
 # ========================================
 
-@dataclass
+@dataclass(slots=True)
 class EstadisticasClasificacion(EstadisticasBase):
     """Estadísticas del proceso de clasificación"""
     total: int = 0
@@ -72,6 +103,14 @@ class ClasificadorDocumentos(BackendBase):
     - Arquitectura consistente con ExtractorAdjuntosOutlook
     """
     
+    # Intervalos mínimos (segundos) entre notificaciones de progreso y de log
+    INTERVALO_PROGRESO = 0.1
+    INTERVALO_LOG_PROGRESO = 1.0
+    
+    # Hilos para mover archivos: cada rename es E/S casi pura (libera el GIL)
+    # y en unidades de red su latencia domina
+    MAX_HILOS = min(32, (os.cpu_count() or 1) * 4)
+    
     def __init__(self, 
                  callback_mensaje=None,
                  callback_progreso=None,
@@ -81,22 +120,34 @@ class ClasificadorDocumentos(BackendBase):
         
         self.estadisticas = EstadisticasClasificacion()
         self.cancelado = False
+        self._ultimo_progreso_t = 0.0
+        self._ultimo_log_t = 0.0
+        self._ultimo_pct = -1
+        self._origen_fd: Optional[int] = None
+        self._destino_fds: dict = {}
+        # Archivos movidos pendientes de notificar: (es_firmado, nombre).
+        # deque: append/popleft son seguros entre hilos
+        self._movidos_pendientes = deque()
     
     # ========================================
     # IMPLEMENTACIÓN DE MÉTODOS ABSTRACTOS
     # ========================================
     
-    def validar_parametros(self, carpeta_origen: str) -> tuple[bool, str]:
-        """Valida los parámetros de clasificación"""
+    @classmethod
+    def validar_parametros(cls, carpeta_origen: str) -> tuple[bool, str]:
+        """
+        Valida los parámetros de clasificación.
+        No depende del estado de la instancia: puede llamarse sobre la clase.
+        """
         
         # Validar carpeta existe
-        es_valido, mensaje = self._validar_carpeta_existe(carpeta_origen, "carpeta de origen")
+        es_valido, mensaje = cls._validar_carpeta_existe(carpeta_origen, "carpeta de origen")
         if not es_valido:
             return False, mensaje
         
-        # Verificar permisos de escritura
-        carpeta_path = Path(carpeta_origen)
-        if not self._verificar_permisos_escritura(carpeta_path):
+        # Verificar permisos de escritura (os.access: una sola llamada, sin
+        # crear archivos de prueba)
+        if not cls._verificar_permisos_escritura(carpeta_origen):
             return False, "No tiene permisos de escritura en la carpeta"
         
         return True, ""
@@ -108,6 +159,9 @@ class ClasificadorDocumentos(BackendBase):
         self.estadisticas = EstadisticasClasificacion()
         self.estadisticas.tiempo_inicio = datetime.now()
         self.cancelado = False
+        conteos = Counter()
+        # Tareas enviadas al pool y aún no contabilizadas
+        pendientes = set()
         
         try:
             # Cambiar a fase inicial
@@ -125,15 +179,20 @@ class ClasificadorDocumentos(BackendBase):
             if not self._crear_carpeta_segura(carpeta_sin_firmar):
                 raise Exception("No se pudo crear carpeta de sin firmar")
             
+            # Rutas destino como str una sola vez (sin aritmética de Path por archivo)
+            firmados_dir = os.fspath(carpeta_firmados)
+            sin_firmar_dir = os.fspath(carpeta_sin_firmar)
+            self._abrir_dir_fds(carpeta_path, (firmados_dir, sin_firmar_dir))
+            
             self._enviar_mensaje(
                 FaseProceso.INICIAL,
                 NivelMensaje.SUCCESS,
                 "Carpetas de destino creadas correctamente"
             )
             
-            # Obtener archivos a procesar
-            archivos = [f for f in carpeta_path.iterdir() if f.is_file()]
-            total = len(archivos)
+            # Contar archivos a procesar; la clasificación recorre la carpeta
+            # en streaming sin materializar la lista
+            total = sum(1 for _ in self._iter_archivos(carpeta_path))
             self.estadisticas.total = total
             
             if total == 0:
@@ -156,27 +215,68 @@ class ClasificadorDocumentos(BackendBase):
             self._cambiar_estado(EstadoProceso.CLASIFICANDO)  # ← Cambiado
             
             procesados = 0
+            reportados = 0
+            self._ultimo_progreso_t = self._ultimo_log_t = 0.0
+            self._ultimo_pct = -1
             
-            for archivo in archivos:
-                if self.cancelado:
-                    break
-                
-                self._verificar_cancelacion()
-                self._verificar_pausa()
+            def registrar(hechos):
+                nonlocal procesados, total, reportados
+                conteos.update(f.result() for f in hechos)
+                procesados += len(hechos)
+                # Archivos añadidos tras el conteo inicial amplían el total
+                total = max(total, procesados)
                 
-                # Clasificar archivo
-                self._clasificar_archivo(archivo, carpeta_firmados, carpeta_sin_firmar)
+                # Notificar como máximo cada INTERVALO_* segundos o al final
+                ahora = time.monotonic()
+                if procesados == total or ahora - self._ultimo_progreso_t >= self.INTERVALO_PROGRESO:
+                    self._reportar_progreso(procesados, total, ahora)
+                    reportados = procesados
+            
+            # Ventana acotada de tareas en vuelo: memoria constante y
+            # cancelación/pausa revisadas antes de cada envío
+            ventana = self.MAX_HILOS * 2
+            enviados = 0
+            
+            # Una sola pasada: cada entrada se filtra y se envía a clasificar
+            # en cuanto llega del directorio
+            with ThreadPoolExecutor(max_workers=self.MAX_HILOS) as executor, \
+                    os.scandir(carpeta_path) as it:
+                # Métodos enlazados una vez fuera del bucle por archivo
+                enviar = executor.submit
+                resolver = self._resolver_archivo
+                agregar = pendientes.add
                 
-                procesados += 1
-                self._actualizar_progreso(procesados, total)
+                for archivo in it:
+                    if not archivo.is_file(follow_symlinks=False):
+                        continue
+                    
+                    if self.cancelado:
+                        break
+                    
+                    # Pausa/cancelación vía Event cada 32 archivos; self.cancelado
+                    # ya da una salida rápida en cada iteración
+                    if enviados & 31 == 0:
+                        self._verificar_cancelacion()
+                        self._verificar_pausa()
+                    
+                    # Clasificar archivo
+                    agregar(enviar(resolver, archivo, firmados_dir, sin_firmar_dir))
+                    enviados += 1
+                    
+                    if len(pendientes) >= ventana:
+                        hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                        pendientes -= hechos  # mismo set: 'agregar' sigue enlazado
+                        registrar(hechos)
                 
-                # Log cada 10 archivos o al final
-                if procesados % 10 == 0 or procesados == total:
-                    self._enviar_mensaje(
-                        FaseProceso.CLASIFICANDO,
-                        NivelMensaje.INFO,
-                        f"Procesados: {procesados}/{total} ({(procesados/total)*100:.1f}%)"
-                    )
+                while pendientes:
+                    hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    registrar(hechos)
+            
+            self._volcar_conteos(conteos)
+            self._notificar_movidos()
+            
+            if reportados != procesados:
+                self._reportar_progreso(procesados, total, time.monotonic())
             
             # Finalizar
             self._cambiar_fase(FaseProceso.FINALIZACION)
@@ -195,8 +295,17 @@ class ClasificadorDocumentos(BackendBase):
             return self._generar_reporte()
             
         except InterruptedError:
+            # Al cerrar el pool las tareas ya enviadas terminan (y mueven sus
+            # archivos): se contabilizan para que las estadísticas reflejen
+            # lo que realmente quedó en disco
+            conteos.update(f.result() for f in pendientes)
+            self._volcar_conteos(conteos)
+            self._notificar_movidos()
             self.estadisticas.tiempo_fin = datetime.now()
             raise
+        
+        finally:
+            self._cerrar_dir_fds()
     
     def _generar_reporte(self) -> dict:
         """Genera reporte final de estadísticas"""
@@ -210,7 +319,7 @@ class ClasificadorDocumentos(BackendBase):
         }
     
     # ========================================
-    # SOBRESCRITURA DE CANCELAR
+    # SOBRESCRITURA DE CANCELAR Y RESETEAR
     # ========================================
     
     def cancelar(self):
@@ -218,18 +327,161 @@ class ClasificadorDocumentos(BackendBase):
         super().cancelar()
         self.cancelado = True
     
+    def resetear(self):
+        """Resetea el clasificador para otro proceso (sobrescribe método base)"""
+        super().resetear()
+        self.estadisticas = EstadisticasClasificacion()
+        self.cancelado = False
+        self._movidos_pendientes.clear()
+    
     # ========================================
     # LÓGICA ESPECÍFICA DE CLASIFICACIÓN
     # ========================================
     
-    def _clasificar_archivo(self, archivo: Path, 
-                           carpeta_firmados: Path, 
-                           carpeta_sin_firmar: Path) -> str:
+    def _reportar_progreso(self, procesados: int, total: int, ahora: float):
+        """Notifica el progreso y, con menor frecuencia, lo registra en el log"""
+        self._ultimo_progreso_t = ahora
+        self._notificar_movidos()
+        self._actualizar_progreso(procesados, total)
+        
+        # Porcentaje entero: el log solo avanza cuando cambia el punto porcentual
+        pct = procesados * 100 // total
+        if pct == self._ultimo_pct:
+            return
+        
+        if procesados == total or ahora - self._ultimo_log_t >= self.INTERVALO_LOG_PROGRESO:
+            self._ultimo_log_t = ahora
+            self._ultimo_pct = pct
+            self._enviar_mensaje(
+                FaseProceso.CLASIFICANDO,
+                NivelMensaje.INFO,
+                f"Procesados: {procesados}/{total} ({pct}%)"
+            )
+    
+    def _notificar_movidos(self):
+        """
+        Envía los archivos movidos desde la última notificación en un
+        mensaje por categoría, en lugar de un mensaje por archivo.
+        """
+        sin_firmar, firmados = [], []
+        while True:
+            try:
+                es_firmado, nombre = self._movidos_pendientes.popleft()
+            except IndexError:
+                break
+            (firmados if es_firmado else sin_firmar).append(nombre)
+        
+        if sin_firmar:
+            self._enviar_mensaje(
+                FaseProceso.CLASIFICANDO,
+                NivelMensaje.WARNING,
+                f"⚠️ Sin firmar ({len(sin_firmar)}): {', '.join(sin_firmar)}"
+            )
+        if firmados:
+            self._enviar_mensaje(
+                FaseProceso.CLASIFICANDO,
+                NivelMensaje.SUCCESS,
+                f"✅ Firmados ({len(firmados)}): {', '.join(firmados)}"
+            )
+    
+    @staticmethod
+    def _iter_archivos(carpeta: Path):
+        """
+        Genera los archivos (DirEntry) de la carpeta, sin subcarpetas.
+        
+        DirEntry reutiliza el tipo leído del directorio, sin un stat por archivo.
+        """
+        with os.scandir(carpeta) as it:
+            for entrada in it:
+                if entrada.is_file(follow_symlinks=False):
+                    yield entrada
+    
+    def _abrir_dir_fds(self, carpeta_origen: Path, carpetas_destino: tuple):
+        """
+        Abre descriptores de la carpeta origen y de las destino, si el
+        sistema admite rename relativo a carpeta. Si falla, se usan rutas.
+        """
+        if not _RENAME_CON_DIR_FD:
+            return
+        
+        try:
+            self._origen_fd = os.open(carpeta_origen, os.O_RDONLY | os.O_DIRECTORY)
+            for carpeta in carpetas_destino:
+                self._destino_fds[carpeta] = os.open(carpeta, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            self._cerrar_dir_fds()
+    
+    def _cerrar_dir_fds(self):
+        """Cierra los descriptores abiertos por _abrir_dir_fds"""
+        for fd in (self._origen_fd, *self._destino_fds.values()):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._origen_fd = None
+        self._destino_fds = {}
+    
+    def _mover_archivo(self, archivo, carpeta_destino: str):
+        """
+        Mueve el archivo a la carpeta destino conservando su nombre.
+        
+        Las carpetas destino cuelgan del origen, así que basta un rename
+        (solo metadatos); shutil.move queda como respaldo entre unidades.
+        Se usa os.replace y no os.rename: un archivo homónimo en el destino se
+        sobrescribe en todas las plataformas, igual que hacía shutil.move.
+        """
+        origen = os.fspath(archivo)
+        destino = os.path.join(carpeta_destino, archivo.name)
+        destino_fd = self._destino_fds.get(carpeta_destino)
+        try:
+            if destino_fd is not None and self._origen_fd is not None:
+                # Solo en POSIX, donde os.rename ya sobrescribe como os.replace
+                os.rename(archivo.name, archivo.name,
+                          src_dir_fd=self._origen_fd, dst_dir_fd=destino_fd)
+            else:
+                os.replace(origen, destino)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(origen, destino)
+    
+    def _volcar_conteos(self, conteos: Counter):
+        """Traslada los resultados acumulados a las estadísticas"""
+        for resultado, cantidad in conteos.items():
+            campo = _CAMPO_RESULTADO[resultado]
+            setattr(self.estadisticas, campo, getattr(self.estadisticas, campo) + cantidad)
+        conteos.clear()
+    
+    def _clasificar_archivo(self, archivo: os.DirEntry, 
+                           carpeta_firmados: str, 
+                           carpeta_sin_firmar: str) -> str:
+        """
+        Clasifica un archivo individual y lo contabiliza en las estadísticas.
+        
+        Args:
+            archivo: Archivo a clasificar (DirEntry de os.scandir o Path)
+            carpeta_firmados: Carpeta de destino para firmados
+            carpeta_sin_firmar: Carpeta de destino para sin firmar
+            
+        Returns:
+            str: Resultado de la clasificación ('firmado', 'sin_firmar', 'omitido', 'error')
+        """
+        resultado = self._resolver_archivo(archivo, carpeta_firmados, carpeta_sin_firmar)
+        self._volcar_conteos(Counter((resultado,)))
+        self._notificar_movidos()
+        return resultado
+    
+    def _resolver_archivo(self, archivo: os.DirEntry, 
+                          carpeta_firmados: str, 
+                          carpeta_sin_firmar: str) -> str:
         """
-        Clasifica un archivo individual según su nombre.
+        Clasifica un archivo individual según su nombre, sin tocar las
+        estadísticas (el bucle principal acumula los resultados). Los
+        archivos movidos se notifican en lote con _notificar_movidos.
         
         Args:
-            archivo: Archivo a clasificar
+            archivo: Archivo a clasificar (DirEntry de os.scandir o Path)
             carpeta_firmados: Carpeta de destino para firmados
             carpeta_sin_firmar: Carpeta de destino para sin firmar
             
@@ -238,48 +490,29 @@ class ClasificadorDocumentos(BackendBase):
         """
         nombre_lower = archivo.name.lower()
         
+        # Filtro previo: todo patrón contiene "firma" o "signed"; la mayoría de
+        # nombres no coincide con ninguno y se descarta sin evaluar regex
+        if "firma" not in nombre_lower and "signed" not in nombre_lower:
+            return 'omitido'
+        
         try:
             # Verificar si es "sin firmar" (prioridad)
-            # Detectar tanto "sin firmar", "sin_firmar", "sinfirmar", "not signed", "not_signed"
-            es_sin_firmar = (
-                "sin firmar" in nombre_lower or 
-                "sin_firmar" in nombre_lower or
-                "sinfirmar" in nombre_lower or
-                "not signed" in nombre_lower or
-                "not_signed" in nombre_lower or
-                "notsigned" in nombre_lower
-            )
-            
-            if es_sin_firmar:
-                destino = carpeta_sin_firmar / archivo.name
-                shutil.move(str(archivo), str(destino))
-                self.estadisticas.sin_firmar += 1
-                self._enviar_mensaje(
-                    FaseProceso.CLASIFICANDO,
-                    NivelMensaje.WARNING,
-                    f"⚠️ Sin firmar: {archivo.name}"
-                )
+            if _buscar_sin_firmar(nombre_lower):
+                self._mover_archivo(archivo, carpeta_sin_firmar)
+                self._movidos_pendientes.append((False, archivo.name))
                 return 'sin_firmar'
             
             # Verificar si es "firmado"
-            elif "firmado" in nombre_lower or "signed" in nombre_lower:
-                destino = carpeta_firmados / archivo.name
-                shutil.move(str(archivo), str(destino))
-                self.estadisticas.firmados += 1
-                self._enviar_mensaje(
-                    FaseProceso.CLASIFICANDO,
-                    NivelMensaje.SUCCESS,
-                    f"✅ Firmado: {archivo.name}"
-                )
+            elif _buscar_firmado(nombre_lower):
+                self._mover_archivo(archivo, carpeta_firmados)
+                self._movidos_pendientes.append((True, archivo.name))
                 return 'firmado'
             
             # No coincide con ningún criterio
             else:
-                self.estadisticas.omitidos += 1
                 return 'omitido'
                 
         except PermissionError:
-            self.estadisticas.errores += 1
             self._enviar_mensaje(
                 FaseProceso.CLASIFICANDO,
                 NivelMensaje.ERROR,
@@ -288,7 +521,6 @@ class ClasificadorDocumentos(BackendBase):
             return 'error'
             
         except Exception as e:
-            self.estadisticas.errores += 1
             self._enviar_mensaje(
                 FaseProceso.CLASIFICANDO,
                 NivelMensaje.ERROR,
@@ -312,8 +544,6 @@ class ClasificadorDocumentos(BackendBase):
 # EJEMPLO DE USO
 # ========================================
 if __name__ == "__main__":
-    import time
-    
     def callback_mensaje(fase, nivel, texto: str):
         print(f"[{fase.value.upper()}] [{nivel.value.upper()}] {texto}")
     
@@ -4,10 +4,16 @@ Extractor de adjuntos de correos de Outlook.
 FASE 2 - Hereda de BackendBase
 """
 
+import gc
 import os
+import queue
+import re
 import sys
+import threading
+import warnings
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from typing import List, Optional
@@ -15,8 +21,10 @@ from typing import List, Optional
 import pythoncom
 import win32com.client
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
 
 from backend_base import (
     BackendBase,
@@ -39,6 +47,15 @@ __all__ = [
 ]
 
 
+# ========================================
+# CONSTANTES DE OUTLOOK
+# ========================================
+
+# OlAttachmentType que corresponden a archivos: olByValue y olByReference
+# (se excluyen olEmbeddeditem = 5 y olOLE = 6)
+TIPOS_ADJUNTO_ARCHIVO = (1, 4)
+
+
 # ========================================
 # ENUMS ESPECÍFICOS
 # ========================================
@@ -62,8 +79,10 @@ class EstadisticasExtraccion(EstadisticasBase):
     correos_procesados: int = 0
     adjuntos_descargados: int = 0
     adjuntos_fallidos: int = 0
+    adjuntos_omitidos: int = 0
     tamaño_total_mb: float = 0.0
-    archivos_descargados: List[dict] = field(default_factory=list)
+    # (nombre, fecha_descarga, fecha_correo, hora_correo) por archivo
+    archivos_descargados: List[tuple] = field(default_factory=list)
     
     @property
     def tasa_exito(self) -> float:
@@ -85,6 +104,17 @@ class ExtractorAdjuntosOutlook(BackendBase):
     - Solo implementa lógica específica de Outlook
     """
     
+    # Columnas leídas con Folder.GetTable durante el filtrado (mismo orden que
+    # las filas que consume _filtrar_correos)
+    COLUMNAS_TABLA = (
+        "EntryID",
+        "Subject",
+        "ReceivedTime",
+        "urn:schemas:httpmail:hasattachment",
+    )
+    # Cada cuántos correos descargados se registra el avance en el log
+    INTERVALO_LOG_DESCARGA = 10
+    
     def __init__(self, 
                  callback_mensaje=None,
                  callback_progreso=None, 
@@ -100,8 +130,31 @@ class ExtractorAdjuntosOutlook(BackendBase):
             "max_lote": 50,
             "max_reintentos": 3,
             "pausa_entre_lotes": 0.5,
-            "liberar_memoria_cada": 5
+            "liberar_memoria_cada": 5,
+            # Filtrar el rango de fechas en Outlook (Items.Restrict) en lugar de
+            # recorrer toda la bandeja desde Python
+            "filtro_servidor": True,
+            # Hilos de descarga (cada uno con su propia conexión COM a Outlook).
+            # 1 = descarga secuencial en el hilo del proceso (por defecto)
+            "hilos_descarga": 1,
+            # Omitir correos adjuntos y objetos OLE (solo se guardan archivos)
+            "omitir_incrustados": False,
+            # Adjuntos más pequeños se omiten (p. ej. imágenes de firma). 0 = todos
+            "tamaño_minimo_bytes": 0
         }
+        
+        # Protege estadísticas y reserva de nombres entre hilos de descarga
+        self._lock_descarga = threading.Lock()
+        # Conexión COM por hilo de descarga (namespace MAPI)
+        self._com_hilo = threading.local()
+        # Namespace y StoreID de la carpeta en proceso (para GetItemFromID)
+        self._namespace = None
+        self._store_id = None
+        # Nombres ya presentes en la carpeta destino (en minúsculas, como
+        # los compara Windows); se carga una vez por descarga
+        self._nombres_destino = set()
+        # Descargas pendientes de notificar (se agrupan en un solo mensaje)
+        self._descargados_pendientes = deque()
     
     # ========================================
     # IMPLEMENTACIÓN DE MÉTODOS ABSTRACTOS
@@ -112,6 +165,28 @@ class ExtractorAdjuntosOutlook(BackendBase):
                           fecha_fin: datetime) -> tuple[bool, str]:
         """Valida los parámetros de extracción"""
         
+        es_valido, mensaje = self.validar_datos(destino, outlook_folder, fecha_inicio, fecha_fin)
+        if not es_valido:
+            return False, mensaje
+        
+        # Aviso si no hay frases
+        if not frases:
+            self._enviar_mensaje(
+                FaseProceso.INICIAL,
+                NivelMensaje.WARNING,
+                "No se especificaron frases: se descargarán todos los adjuntos"
+            )
+        
+        return True, ""
+    
+    @classmethod
+    def validar_datos(cls, destino: str, outlook_folder: str,
+                      fecha_inicio: datetime, fecha_fin: datetime) -> tuple[bool, str]:
+        """
+        Validación de los datos de entrada sin avisos al callback.
+        No depende del estado de la instancia: puede llamarse sobre la clase.
+        """
+        
         # Validar carpeta destino
         if not destino or not destino.strip():
             return False, "Debe seleccionar una carpeta de destino"
@@ -121,7 +196,7 @@ class ExtractorAdjuntosOutlook(BackendBase):
             return False, "Debe seleccionar una bandeja de correo"
         
         # Validar fechas
-        es_valido, mensaje = self._validar_rango_fechas(fecha_inicio, fecha_fin)
+        es_valido, mensaje = cls._validar_rango_fechas(fecha_inicio, fecha_fin)
         if not es_valido:
             return False, mensaje
         
@@ -131,14 +206,6 @@ class ExtractorAdjuntosOutlook(BackendBase):
         except Exception as e:
             return False, f"No se puede crear la carpeta de destino: {str(e)}"
         
-        # Aviso si no hay frases
-        if not frases:
-            self._enviar_mensaje(
-                FaseProceso.INICIAL,
-                NivelMensaje.WARNING,
-                "No se especificaron frases: se descargarán todos los adjuntos"
-            )
-        
         return True, ""
     
     def _procesar_principal(self, frases: List[str], destino: str,
@@ -149,6 +216,7 @@ class ExtractorAdjuntosOutlook(BackendBase):
         # Resetear estadísticas
         self.estadisticas = EstadisticasExtraccion()
         self.estadisticas.tiempo_inicio = datetime.now()
+        gc_activo = gc.isenabled()
         
         try:
             # Crear log
@@ -157,11 +225,18 @@ class ExtractorAdjuntosOutlook(BackendBase):
             # Conectar a Outlook
             namespace = self._conectar_outlook()
             carpeta = self._obtener_carpeta(namespace, outlook_folder)
+            self._namespace = namespace
+            self._store_id = carpeta.StoreID
+            
+            # Sin recolección automática durante filtrado y descarga (muchos
+            # objetos COM de vida corta); se recolecta entre fases
+            gc.disable()
             
             # Filtrar correos
             correos_filtrados = self._filtrar_correos(
                 carpeta, frases, fecha_inicio, fecha_fin
             )
+            gc.collect()
             
             if not correos_filtrados:
                 self._enviar_mensaje(
@@ -179,16 +254,17 @@ class ExtractorAdjuntosOutlook(BackendBase):
             self.estadisticas.tiempo_fin = datetime.now()
             
             # Generar reportes
-            self._finalizar_log_archivo(self._generar_reporte())
+            reporte = self._generar_reporte()
+            self._finalizar_log_archivo(reporte)
             self._generar_excel_listado(destino)
             
             self._enviar_mensaje(
                 FaseProceso.FINALIZACION,
                 NivelMensaje.SUCCESS,
-                f"Proceso completado: {self.estadisticas.adjuntos_descargados} adjuntos descargados"
+                f"Proceso completado: {reporte['adjuntos_descargados']} adjuntos descargados"
             )
             
-            return self._generar_reporte()
+            return reporte
             
         except InterruptedError:
             self.estadisticas.tiempo_fin = datetime.now()
@@ -196,6 +272,11 @@ class ExtractorAdjuntosOutlook(BackendBase):
             raise
             
         finally:
+            if gc_activo:
+                gc.enable()
+            
+            # Liberar la referencia COM antes de cerrar el apartamento
+            self._namespace = None
             try:
                 pythoncom.CoUninitialize()
             except:
@@ -208,11 +289,21 @@ class ExtractorAdjuntosOutlook(BackendBase):
             "correos_procesados": self.estadisticas.correos_procesados,
             "adjuntos_descargados": self.estadisticas.adjuntos_descargados,
             "adjuntos_fallidos": self.estadisticas.adjuntos_fallidos,
+            "adjuntos_omitidos": self.estadisticas.adjuntos_omitidos,
             "tamaño_total_mb": self.estadisticas.tamaño_total_mb,
             "tiempo_total": self.estadisticas.tiempo_total,
             "tasa_exito": self.estadisticas.tasa_exito
         }
     
+    def resetear(self):
+        """Resetea el extractor para otro proceso (sobrescribe método base)"""
+        super().resetear()
+        self.estadisticas = EstadisticasExtraccion()
+        self._namespace = None
+        self._store_id = None
+        self._nombres_destino = set()
+        self._descargados_pendientes.clear()
+    
     # ========================================
     # MÉTODOS ESPECÍFICOS DE OUTLOOK
     # ========================================
@@ -270,8 +361,8 @@ class ExtractorAdjuntosOutlook(BackendBase):
             raise ValueError(error_msg)
     
     def _filtrar_correos(self, carpeta, frases: List[str], 
-                        fecha_inicio: datetime, fecha_fin: datetime) -> List:
-        """Filtra correos según criterios"""
+                        fecha_inicio: datetime, fecha_fin: datetime) -> List[str]:
+        """Filtra correos según criterios y devuelve sus EntryID"""
         
         self.fase_actual = FaseProceso.FILTRADO
         self._cambiar_estado(EstadoProceso.FILTRANDO)  # ← Cambiado
@@ -296,7 +387,6 @@ class ExtractorAdjuntosOutlook(BackendBase):
         
         # ✅ NUEVO: Detectar primera y última fecha en la bandeja
         items = carpeta.Items
-        items.Sort("[ReceivedTime]", True)  # Ordenar descendente (más reciente primero)
         
         total_items = items.Count
         primera_fecha = None
@@ -305,25 +395,23 @@ class ExtractorAdjuntosOutlook(BackendBase):
         # Detectar rango real de fechas en la bandeja
         if total_items > 0:
             try:
-                # Última fecha (más reciente) - primer item (índice 1 en win32com)
-                for i in range(1, min(total_items + 1, 20)):  # Revisar primeros 20
-                    try:
-                        item = items.Item(i)
-                        if hasattr(item, 'ReceivedTime'):
-                            ultima_fecha = item.ReceivedTime.replace(tzinfo=None)
-                            break
-                    except:
-                        continue
-                
-                # Primera fecha (más antigua) - últimos items
-                for i in range(total_items, max(total_items - 20, 0), -1):  # Revisar últimos 20
-                    try:
-                        item = items.Item(i)
-                        if hasattr(item, 'ReceivedTime'):
-                            primera_fecha = item.ReceivedTime.replace(tzinfo=None)
-                            break
-                    except:
-                        continue
+                try:
+                    # Extremos leídos de una Table de una sola columna, sin
+                    # ordenar la colección Items ni instanciar sus elementos
+                    primera_fecha, ultima_fecha = self._rango_fechas_tabla(carpeta)
+                except Exception as e:
+                    self.logger.warning(f"GetTable no disponible para el rango de fechas: {e}")
+                    
+                    # Se usan los cursores GetFirst/GetNext y GetLast/GetPrevious:
+                    # Items.Item(i) sobre una colección ordenada es O(i) en Outlook
+                    items.IncludeRecurrences = False
+                    items.Sort("[ReceivedTime]", True)  # Ordenar descendente (más reciente primero)
+                    
+                    # Última fecha (más reciente) - primeros items
+                    ultima_fecha = self._primera_fecha_recibida(items.GetFirst, items.GetNext)
+                    
+                    # Primera fecha (más antigua) - últimos items
+                    primera_fecha = self._primera_fecha_recibida(items.GetLast, items.GetPrevious)
                 
                 if primera_fecha and ultima_fecha:
                     self._enviar_mensaje(
@@ -353,14 +441,42 @@ class ExtractorAdjuntosOutlook(BackendBase):
                     f"No se pudo determinar rango de fechas en bandeja: {str(e)}"
                 )
         
+        # Rango de fechas resuelto por Outlook: solo se recorren los candidatos
+        filtro = ""
+        if self.config.get("filtro_servidor", True):
+            filtro = self._filtro_rango_fechas(fecha_inicio_normalizada, fecha_fin_normalizada)
+        
+        try:
+            # Table solo trae las columnas necesarias, sin instanciar cada MailItem
+            filas, total_items = self._filas_tabla(carpeta, filtro)
+        except Exception as e:
+            self.logger.warning(f"GetTable no disponible, se recorren los Items: {e}")
+            filas, total_items = self._filas_items(items, filtro)
+        
+        if filtro:
+            self._enviar_mensaje(
+                FaseProceso.FILTRADO,
+                NivelMensaje.INFO,
+                f"Correos en el rango (filtro de Outlook): {total_items}"
+            )
+        
         correos_filtrados = []
+        # Todas las frases en un solo patrón (sin distinguir mayúsculas): una
+        # búsqueda en C por correo en lugar de un bucle Python por frase
+        patron_frases = re.compile(
+            "|".join(re.escape(frase) for frase in frases), re.IGNORECASE
+        ) if frases else None
+        buscar_frase = patron_frases.search if patron_frases else None
+        # Progreso cada 10%
+        paso_progreso = max(1, total_items // 10)
+        siguiente_progreso = paso_progreso
         
-        for idx, item in enumerate(items, 1):
+        for idx, fila in enumerate(filas, 1):
             self._verificar_cancelacion()
             self._verificar_pausa()
             
-            # Progreso cada 10%
-            if idx % max(1, total_items // 10) == 0 or idx == total_items:
+            if idx >= siguiente_progreso or idx == total_items:
+                siguiente_progreso += paso_progreso
                 porcentaje = (idx / total_items) * 100
                 self._enviar_mensaje(
                     FaseProceso.FILTRADO,
@@ -369,26 +485,26 @@ class ExtractorAdjuntosOutlook(BackendBase):
                 )
             
             try:
+                entry_id, asunto, fecha_recibido, tiene_adjuntos = fila
+                
                 # Verificar que sea un correo
-                if not hasattr(item, 'ReceivedTime'):
+                if fecha_recibido is None:
                     continue
                 
                 # ✅ CORRECCIÓN: Normalizar fecha del correo y comparar correctamente
-                fecha_correo = item.ReceivedTime.replace(tzinfo=None)
+                fecha_correo = fecha_recibido.replace(tzinfo=None)
                 
                 # Comparar con fechas normalizadas (incluye todo el día)
                 if not (fecha_inicio_normalizada <= fecha_correo <= fecha_fin_normalizada):
                     continue
                 
                 # Filtrar por frases (si se especificaron)
-                if frases:
-                    asunto = item.Subject.lower() if hasattr(item, 'Subject') else ""
-                    if not any(frase.lower() in asunto for frase in frases):
-                        continue
+                if buscar_frase and not buscar_frase(asunto or ""):
+                    continue
                 
                 # Verificar que tenga adjuntos
-                if hasattr(item, 'Attachments') and item.Attachments.Count > 0:
-                    correos_filtrados.append(item)
+                if tiene_adjuntos:
+                    correos_filtrados.append(entry_id)
                     
             except Exception as e:
                 self.logger.warning(f"Error al procesar item {idx}: {e}")
@@ -404,8 +520,133 @@ class ExtractorAdjuntosOutlook(BackendBase):
         
         return correos_filtrados
     
-    def _descargar_adjuntos(self, correos_filtrados: List, carpeta_destino: str):
-        """Descarga adjuntos de los correos filtrados"""
+    @staticmethod
+    def _iterar_items(items):
+        """Recorre una colección Items con el cursor GetFirst/GetNext"""
+        item = items.GetFirst()
+        while item is not None:
+            yield item
+            item = items.GetNext()
+    
+    def _filas_tabla(self, carpeta, filtro: str):
+        """
+        Obtiene (EntryID, Subject, ReceivedTime, tiene adjuntos) de cada
+        elemento mediante Folder.GetTable. Devuelve (generador, total).
+        """
+        tabla = carpeta.GetTable(filtro) if filtro else carpeta.GetTable()
+        columnas = tabla.Columns
+        columnas.RemoveAll()
+        for columna in self.COLUMNAS_TABLA:
+            columnas.Add(columna)
+        
+        def filas():
+            while not tabla.EndOfTable:
+                yield tuple(tabla.GetNextRow().GetValues())
+        
+        return filas(), tabla.GetRowCount()
+    
+    def _filas_items(self, items, filtro: str):
+        """
+        Alternativa a _filas_tabla recorriendo los MailItem completos.
+        Devuelve (generador, total) con el mismo formato de fila.
+        """
+        if filtro:
+            try:
+                items = items.Restrict(filtro)
+            except Exception as e:
+                self._enviar_mensaje(
+                    FaseProceso.FILTRADO,
+                    NivelMensaje.WARNING,
+                    f"Filtro de Outlook no disponible, se revisará toda la bandeja: {str(e)}"
+                )
+        
+        def filas():
+            for item in self._iterar_items(items):
+                # Sin filtrar por clase, igual que las filas de GetTable: los
+                # elementos sin estas propiedades dan una fila vacía
+                try:
+                    fila = (
+                        item.EntryID,
+                        item.Subject,
+                        item.ReceivedTime,
+                        item.Attachments.Count > 0
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Error al leer item: {e}")
+                    fila = (None, None, None, False)
+                yield fila
+        
+        return filas(), items.Count
+    
+    @staticmethod
+    def _rango_fechas_tabla(carpeta, limite: int = 20) -> tuple:
+        """
+        Devuelve (más antigua, más reciente) ReceivedTime de la carpeta usando
+        una Table con solo esa columna. Se revisan como máximo `limite` filas
+        por extremo (elementos sin fecha se omiten).
+        """
+        tabla = carpeta.GetTable()
+        tabla.Columns.RemoveAll()
+        tabla.Columns.Add("ReceivedTime")
+        
+        def primera_fecha(descendente: bool) -> Optional[datetime]:
+            tabla.Sort("[ReceivedTime]", descendente)
+            tabla.MoveToStart()
+            for _ in range(limite):
+                if tabla.EndOfTable:
+                    break
+                fecha = tabla.GetNextRow().GetValues()[0]
+                if fecha:
+                    return fecha.replace(tzinfo=None)
+            return None
+        
+        return primera_fecha(False), primera_fecha(True)
+    
+    @staticmethod
+    def _primera_fecha_recibida(primero, siguiente, limite: int = 20) -> Optional[datetime]:
+        """
+        Devuelve la ReceivedTime del primer elemento con fecha recorriendo el
+        cursor (primero, siguiente), revisando como máximo `limite` elementos.
+        """
+        try:
+            item = primero()
+        except Exception:
+            return None
+        
+        for _ in range(limite):
+            if item is None:
+                break
+            try:
+                fecha = item.ReceivedTime
+                if fecha:
+                    return fecha.replace(tzinfo=None)
+            except Exception:
+                pass
+            try:
+                item = siguiente()
+            except Exception:
+                break
+        return None
+    
+    @staticmethod
+    def _filtro_rango_fechas(fecha_inicio: datetime, fecha_fin: datetime) -> str:
+        """
+        Construye el filtro DASL de Items.Restrict / GetTable para el rango de fechas.
+        
+        Se usa DASL con fechas ISO (aaaa-mm-dd) y no un filtro Jet: los literales
+        Jet se interpretan con el formato de fecha corta regional de Windows y en
+        configuraciones dd/mm se invertían o rechazaban. DASL compara en UTC, por
+        lo que el rango se amplía un día por cada lado y la comparación exacta se
+        sigue haciendo en Python sobre los candidatos.
+        """
+        formato = "%Y-%m-%d %H:%M"
+        desde = (fecha_inicio - timedelta(days=1)).strftime(formato)
+        hasta = (fecha_fin + timedelta(days=1)).strftime(formato)
+        campo = '"urn:schemas:httpmail:datereceived"'
+        return f"@SQL={campo} >= '{desde}' AND {campo} <= '{hasta}'"
+    
+    def _descargar_adjuntos(self, correos_filtrados: List[str], carpeta_destino: str):
+        """Descarga adjuntos de los correos filtrados (lista de EntryID)"""
         
         self.fase_actual = FaseProceso.DESCARGA
         self._cambiar_estado(EstadoProceso.PROCESANDO)  # ← Agregado
@@ -418,31 +659,45 @@ class ExtractorAdjuntosOutlook(BackendBase):
             f"Iniciando descarga de adjuntos de {total_correos} correos"
         )
         
-        for idx, correo in enumerate(correos_filtrados, 1):
-            self._verificar_cancelacion()
-            self._verificar_pausa()
-            
-            try:
-                self._procesar_correo(correo, carpeta_destino)
-                self.estadisticas.correos_procesados += 1
-                
-            except Exception as e:
-                self._enviar_mensaje(
-                    FaseProceso.DESCARGA,
-                    NivelMensaje.ERROR,
-                    f"Error al procesar correo {idx}: {str(e)}"
-                )
-            
-            # Actualizar progreso
-            self._actualizar_progreso(idx, total_correos)
-            
-            # Log cada 10 correos o al final
-            if idx % 10 == 0 or idx == total_correos:
-                self._enviar_mensaje(
-                    FaseProceso.DESCARGA,
-                    NivelMensaje.INFO,
-                    f"Procesados: {idx}/{total_correos} correos ({(idx/total_correos)*100:.1f}%)"
-                )
+        # Un solo listado del destino en lugar de un exists() por adjunto
+        with os.scandir(carpeta_destino) as entradas:
+            self._nombres_destino = {entrada.name.lower() for entrada in entradas}
+        
+        carpeta = Path(carpeta_destino)
+        
+        self._descargados_pendientes.clear()
+        try:
+            hilos = max(1, int(self.config.get("hilos_descarga", 1)))
+            if hilos > 1 and total_correos > 1:
+                self._descargar_en_paralelo(correos_filtrados, carpeta, hilos)
+            else:
+                for idx, entry_id in enumerate(correos_filtrados, 1):
+                    self._verificar_cancelacion()
+                    self._verificar_pausa()
+                    
+                    try:
+                        correo = self._namespace.GetItemFromID(entry_id, self._store_id)
+                        self._procesar_correo(correo, carpeta)
+                        self.estadisticas.correos_procesados += 1
+                        
+                    except InterruptedError:
+                        raise
+                    
+                    except Exception as e:
+                        self._enviar_mensaje(
+                            FaseProceso.DESCARGA,
+                            NivelMensaje.ERROR,
+                            f"Error al procesar correo {idx}: {str(e)}"
+                        )
+                    
+                    finally:
+                        # No mantener el MailItem vivo hasta la siguiente iteración
+                        correo = None
+                    
+                    self._registrar_avance_descarga(idx, total_correos)
+        finally:
+            # Descargas aún no notificadas (también si se canceló)
+            self._notificar_descargados()
         
         self._enviar_mensaje(
             FaseProceso.DESCARGA,
@@ -450,53 +705,234 @@ class ExtractorAdjuntosOutlook(BackendBase):
             f"Descarga completada: {self.estadisticas.adjuntos_descargados} adjuntos descargados"
         )
     
-    def _procesar_correo(self, correo, carpeta_destino: str):
+    def _registrar_avance_descarga(self, idx: int, total_correos: int):
+        """Actualiza el progreso de descarga y lo registra cada INTERVALO_LOG_DESCARGA correos"""
+        self._actualizar_progreso(idx, total_correos)
+        
+        # Con el GC automático desactivado, recolectar las generaciones
+        # jóvenes periódicamente para acotar la memoria retenida, y atender
+        # los mensajes COM pendientes para que Outlook libere los objetos
+        if idx % self.config.get("liberar_memoria_cada", 5) == 0:
+            gc.collect(1)
+            pythoncom.PumpWaitingMessages()
+        
+        # Log cada 10 correos o al final
+        if idx % self.INTERVALO_LOG_DESCARGA == 0 or idx == total_correos:
+            self._notificar_descargados()
+            self._enviar_mensaje(
+                FaseProceso.DESCARGA,
+                NivelMensaje.INFO,
+                f"Procesados: {idx}/{total_correos} correos ({(idx/total_correos)*100:.1f}%)"
+            )
+    
+    def _descargar_en_paralelo(self, correos_filtrados: List[str], carpeta: Path, hilos: int):
+        """
+        Descarga los correos en varios hilos de descarga.
+        
+        Los objetos COM de Outlook no pueden compartirse entre hilos: a cada
+        hilo se le pasa EntryID/StoreID y abre el correo con su propia conexión.
+        Los hilos toman correos de una cola común y devuelven (idx, error);
+        este hilo consume los resultados, actualiza el progreso y atiende la
+        cancelación.
+        """
+        total_correos = len(correos_filtrados)
+        pendientes = queue.SimpleQueue()
+        for idx, entry_id in enumerate(correos_filtrados, 1):
+            pendientes.put((idx, entry_id))
+        resultados = queue.SimpleQueue()
+        detener = threading.Event()
+        
+        trabajadores = [
+            threading.Thread(
+                target=self._hilo_descarga,
+                args=(pendientes, resultados, detener, carpeta),
+                name=f"descarga-{n}",
+                daemon=True
+            )
+            for n in range(min(hilos, total_correos))
+        ]
+        for trabajador in trabajadores:
+            trabajador.start()
+        
+        try:
+            for completados in range(1, total_correos + 1):
+                idx, error = resultados.get()
+                self._verificar_cancelacion()
+                
+                if error is None:
+                    self.estadisticas.correos_procesados += 1
+                elif isinstance(error, InterruptedError):
+                    raise error
+                else:
+                    self._enviar_mensaje(
+                        FaseProceso.DESCARGA,
+                        NivelMensaje.ERROR,
+                        f"Error al procesar correo {idx}: {str(error)}"
+                    )
+                
+                self._registrar_avance_descarga(completados, total_correos)
+        finally:
+            # Ante cancelación no se inician correos pendientes; cada hilo
+            # termina el correo en curso y cierra su propia conexión COM
+            detener.set()
+            for trabajador in trabajadores:
+                trabajador.join()
+    
+    def _hilo_descarga(self, pendientes, resultados, detener: threading.Event, carpeta: Path):
+        """
+        Bucle de un hilo de descarga: abre su conexión COM a Outlook, procesa
+        correos de la cola hasta vaciarla (o hasta que se pida detener) y
+        libera el namespace y el apartamento COM al salir.
+        """
+        pythoncom.CoInitialize()
+        try:
+            try:
+                outlook = win32com.client.Dispatch("Outlook.Application")
+                self._com_hilo.namespace = outlook.GetNamespace("MAPI")
+                outlook = None
+                error_conexion = None
+            except Exception as e:
+                # Se informa en cada correo que tome este hilo
+                error_conexion = e
+            
+            while not detener.is_set():
+                try:
+                    idx, entry_id = pendientes.get_nowait()
+                except queue.Empty:
+                    break
+                
+                error = error_conexion
+                if error is None:
+                    try:
+                        self._procesar_correo_por_id(entry_id, self._store_id, carpeta)
+                    except Exception as e:
+                        error = e
+                resultados.put((idx, error))
+        finally:
+            # Liberar la referencia COM antes de cerrar el apartamento del hilo
+            self._com_hilo.namespace = None
+            pythoncom.CoUninitialize()
+    
+    def _notificar_descargados(self):
+        """
+        Envía los adjuntos descargados desde la última notificación en un
+        solo mensaje, en lugar de un mensaje por archivo.
+        """
+        descargados = []
+        while True:
+            try:
+                descargados.append(self._descargados_pendientes.popleft())
+            except IndexError:
+                break
+        
+        if descargados:
+            self._enviar_mensaje(
+                FaseProceso.DESCARGA,
+                NivelMensaje.SUCCESS,
+                f"✓ Descargados ({len(descargados)}): {', '.join(descargados)}"
+            )
+    
+    def _procesar_correo_por_id(self, entry_id: str, store_id: str, carpeta: Path):
+        """Abre el correo con la conexión del hilo actual y descarga sus adjuntos"""
+        correo = self._com_hilo.namespace.GetItemFromID(entry_id, store_id)
+        try:
+            self._procesar_correo(correo, carpeta)
+        finally:
+            # Liberar el MailItem en el hilo que lo creó
+            del correo
+    
+    def _procesar_correo(self, correo, carpeta: Path):
         """Procesa un correo individual y descarga sus adjuntos"""
         
         fecha_correo = correo.ReceivedTime.replace(tzinfo=None)
-        carpeta = Path(carpeta_destino)
+        # Fecha/hora calculadas una vez por correo, no por adjunto
+        fecha_correo_str = fecha_correo.strftime("%d/%m/%Y")
+        hora_correo_str = fecha_correo.strftime("%H:%M:%S")
+        fecha_descarga = datetime.now()
+        omitir_incrustados = self.config.get("omitir_incrustados", False)
+        tamaño_minimo = self.config.get("tamaño_minimo_bytes", 0)
         
         for adjunto in correo.Attachments:
             self._verificar_cancelacion()
             self._verificar_pausa()
             
             try:
-                nombre_archivo = adjunto.FileName
-                ruta_archivo = carpeta / nombre_archivo
+                # Tamaño informado por Outlook (evita un stat por adjunto)
+                tamaño_bytes = adjunto.Size
                 
-                # Manejar duplicados (método heredado de BackendBase)
-                ruta_archivo = self._manejar_nombre_duplicado(ruta_archivo)
+                # Descartar antes de escribir en disco lo que no se quiere guardar
+                if (omitir_incrustados and adjunto.Type not in TIPOS_ADJUNTO_ARCHIVO) \
+                        or (tamaño_bytes and tamaño_bytes < tamaño_minimo):
+                    with self._lock_descarga:
+                        self.estadisticas.adjuntos_omitidos += 1
+                    continue
+                
+                # Manejar duplicados. El nombre queda reservado en el conjunto
+                # para que otro hilo no lo tome
+                with self._lock_descarga:
+                    ruta_archivo = self._reservar_nombre(carpeta, adjunto.FileName)
                 
                 # Descargar adjunto
-                adjunto.SaveAsFile(str(ruta_archivo))
+                try:
+                    adjunto.SaveAsFile(str(ruta_archivo))
+                except Exception:
+                    ruta_archivo.unlink(missing_ok=True)
+                    with self._lock_descarga:
+                        self._nombres_destino.discard(ruta_archivo.name.lower())
+                    raise
                 
-                # Obtener tamaño
-                tamaño_mb = ruta_archivo.stat().st_size / (1024 * 1024)
-                self.estadisticas.tamaño_total_mb += tamaño_mb
+                # Obtener tamaño (algunos elementos incrustados informan 0)
+                if not tamaño_bytes:
+                    tamaño_bytes = ruta_archivo.stat().st_size
+                tamaño_mb = tamaño_bytes / (1024 * 1024)
                 
                 # Registrar descarga
-                self.estadisticas.adjuntos_descargados += 1
-                self.estadisticas.archivos_descargados.append({
-                    'nombre': ruta_archivo.name,
-                    'fecha_descarga': datetime.now(),
-                    'fecha_correo': fecha_correo.strftime("%d/%m/%Y"),
-                    'hora_correo': fecha_correo.strftime("%H:%M:%S")
-                })
+                with self._lock_descarga:
+                    self.estadisticas.tamaño_total_mb += tamaño_mb
+                    self.estadisticas.adjuntos_descargados += 1
+                    self.estadisticas.archivos_descargados.append(
+                        (ruta_archivo.name, fecha_descarga, fecha_correo_str, hora_correo_str)
+                    )
                 
-                self._enviar_mensaje(
-                    FaseProceso.DESCARGA,
-                    NivelMensaje.SUCCESS,
-                    f"✓ Descargado: {ruta_archivo.name} ({tamaño_mb:.2f} MB)"
-                )
+                self._descargados_pendientes.append(f"{ruta_archivo.name} ({tamaño_mb:.2f} MB)")
                 
+            except InterruptedError:
+                raise
+            
             except Exception as e:
-                self.estadisticas.adjuntos_fallidos += 1
+                with self._lock_descarga:
+                    self.estadisticas.adjuntos_fallidos += 1
                 self._enviar_mensaje(
                     FaseProceso.DESCARGA,
                     NivelMensaje.ERROR,
                     f"✗ Error al descargar {adjunto.FileName}: {str(e)}"
                 )
     
+    def _reservar_nombre(self, carpeta: Path, nombre_archivo: str) -> Path:
+        """
+        Devuelve una ruta libre en la carpeta destino: si el nombre ya está en
+        el conjunto en memoria (sin distinguir mayúsculas) prueba nombre_1.ext,
+        nombre_2.ext, etc.; tras 1000 intentos usa nombre_AAAAMMDD_HHMMSS.ext.
+        Registra el nombre elegido. Debe llamarse con _lock_descarga tomado.
+        """
+        ruta_archivo = carpeta / nombre_archivo
+        nombre_base = ruta_archivo.stem
+        extension = ruta_archivo.suffix
+        contador = 1
+        
+        while ruta_archivo.name.lower() in self._nombres_destino:
+            ruta_archivo = carpeta / f"{nombre_base}_{contador}{extension}"
+            contador += 1
+            
+            # Protección contra loops infinitos
+            if contador > 1000:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                ruta_archivo = carpeta / f"{nombre_base}_{timestamp}{extension}"
+                break
+        
+        self._nombres_destino.add(ruta_archivo.name.lower())
+        return ruta_archivo
+    
     def _generar_excel_listado(self, carpeta_destino: str):
         """Genera archivo Excel con listado de documentos descargados"""
         
@@ -515,35 +951,53 @@ class ExtractorAdjuntosOutlook(BackendBase):
                 "Generando archivo Excel con listado..."
             )
             
-            # Crear workbook
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Lista de Documentos"
+            # Crear workbook en modo streaming (las filas se escriben directo al guardar)
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Lista de Documentos")
             
-            # Encabezados
+            # Encabezados con formato
             encabezados = ["Nº", "Nombre del archivo", "Fecha de descarga", "Fecha correo", "Hora correo"]
-            ws.append(encabezados)
-            
-            # Formato de encabezados
-            for col in range(1, 6):
-                cell = ws.cell(row=1, column=col)
-                cell.font = Font(bold=True, size=11, color="FFFFFF")
-                cell.fill = PatternFill(start_color="16A085", end_color="16A085", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Agregar datos
-            for idx, archivo in enumerate(self.estadisticas.archivos_descargados, start=1):
-                ws.append([
+            fuente = Font(bold=True, size=11, color="FFFFFF")
+            relleno = PatternFill(start_color="16A085", end_color="16A085", fill_type="solid")
+            alineacion = Alignment(horizontal="center", vertical="center")
+            fila_encabezados = []
+            for titulo in encabezados:
+                cell = WriteOnlyCell(ws, value=titulo)
+                cell.font = fuente
+                cell.fill = relleno
+                cell.alignment = alineacion
+                fila_encabezados.append(cell)
+            
+            # Ancho de columnas calculado mientras se agregan las filas
+            anchos = [len(titulo) for titulo in encabezados]
+            filas = []
+            for idx, (nombre, fecha_descarga, fecha_correo, hora_correo) in enumerate(
+                    self.estadisticas.archivos_descargados, start=1):
+                fila = (
                     idx,
-                    archivo['nombre'],
-                    archivo['fecha_descarga'].strftime("%d/%m/%Y %H:%M:%S"),
-                    archivo['fecha_correo'],
-                    archivo['hora_correo']
-                ])
+                    nombre,
+                    fecha_descarga.strftime("%d/%m/%Y %H:%M:%S"),
+                    fecha_correo,
+                    hora_correo
+                )
+                anchos = [max(ancho, len(str(valor))) for ancho, valor in zip(anchos, fila)]
+                filas.append(fila)
+            
+            # En modo write_only las dimensiones deben fijarse antes de escribir filas
+            for col, ancho in enumerate(anchos, start=1):
+                ws.column_dimensions[get_column_letter(col)].width = min(ancho + 2, 60)
+            
+            ws.append(fila_encabezados)
+            for fila in filas:
+                ws.append(fila)
             
             # Crear tabla
-            tabla_ref = f"A1:E{len(self.estadisticas.archivos_descargados) + 1}"
+            tabla_ref = f"A1:E{len(filas) + 1}"
             tabla = Table(displayName="TablaDocumentos", ref=tabla_ref)
+            # En modo write_only las columnas de la tabla se declaran explícitamente
+            tabla.tableColumns = [
+                TableColumn(id=col, name=titulo) for col, titulo in enumerate(encabezados, start=1)
+            ]
             estilo = TableStyleInfo(
                 name="TableStyleMedium2",
                 showFirstColumn=False,
@@ -552,20 +1006,10 @@ class ExtractorAdjuntosOutlook(BackendBase):
                 showColumnStripes=False
             )
             tabla.tableStyleInfo = estilo
-            ws.add_table(tabla)
-            
-            # Autoajustar columnas
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 60)
-                ws.column_dimensions[column].width = adjusted_width
+            with warnings.catch_warnings():
+                # openpyxl avisa siempre en write_only aunque las columnas ya estén definidas
+                warnings.simplefilter("ignore", UserWarning)
+                ws.add_table(tabla)
             
             # Generar nombre de archivo
             ahora = datetime.now()
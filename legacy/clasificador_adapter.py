@@ -1,3 +1,6 @@
+import time
+from collections import deque
+
 from PyQt5.QtCore import QObject, pyqtSignal
 from backend_clasificador import (
     ClasificadorDocumentos,
@@ -5,7 +8,29 @@ from backend_clasificador import (
     NivelMensaje,
     EstadoProceso
 )
-from datetime import datetime
+from adapter_base import (
+    ICONOS,
+    NIVELES_VISIBLES_POR_DEFECTO,
+    MENSAJES_ESTADO,
+    ENCABEZADO_RESUMEN,
+    PIE_RESUMEN,
+    formatear_duracion
+)
+
+
+# Resumen final; las líneas opcionales (errores) llegan ya formateadas
+_PLANTILLA_RESUMEN = (
+    ENCABEZADO_RESUMEN
+    + "   📄 Total de archivos: {total}\n"
+    "   ✅ Documentos firmados: {firmados}\n"
+    "   ⚠️ Documentos sin firmar: {sin_firmar}\n"
+    "   ⏭️ Archivos omitidos: {omitidos}\n"
+    "{linea_errores}"
+    + PIE_RESUMEN
+)
+
+# Valores por defecto de las estadísticas usadas en el resumen
+_VALORES_RESUMEN = {'total': 0, 'firmados': 0, 'sin_firmar': 0, 'omitidos': 0, 'errores': 0, 'tiempo_total': 0}
 
 
 class ClasificadorWorker(QObject):
@@ -24,10 +49,26 @@ class ClasificadorWorker(QObject):
     signal_completado = pyqtSignal(dict)           # Estadísticas finales
     signal_error = pyqtSignal(str)                 # Errores
     
+    # Intervalo (ms) con el que la GUI debe llamar a drenar_log (~30 Hz)
+    INTERVALO_LOG_MS = 33
+    # Líneas que conservan la cola y los logs de la GUI; las más antiguas se
+    # descartan (la GUI tampoco las mostraría)
+    MAX_LINEAS_LOG = 5000
+    # Tiempo mínimo (s) entre emisiones de progreso con el mismo porcentaje
+    INTERVALO_PROGRESO_S = 0.1
+    
     def __init__(self):
         super().__init__()
         self.clasificador = None
         self.carpeta = None
+        # Mensajes pendientes (nivel, texto, instante); el backend solo encola
+        # y la GUI los formatea y muestra al drenarlos (acotada a MAX_LINEAS_LOG)
+        self._lote_log = deque(maxlen=self.MAX_LINEAS_LOG)
+        self._ultimo_segundo = -1
+        self._ultima_marca = ""
+        self._ultimo_porcentaje = -1
+        self._ultimo_emit_progreso = 0.0
+        self._niveles_visibles = NIVELES_VISIBLES_POR_DEFECTO
     
     def inicializar(self, carpeta: str):
         """
@@ -38,37 +79,45 @@ class ClasificadorWorker(QObject):
         """
         self.carpeta = carpeta
         
-        # Crear clasificador con callbacks unificados
-        self.clasificador = ClasificadorDocumentos(
-            callback_mensaje=self._callback_mensaje,
-            callback_progreso=self._callback_progreso,
-            callback_estado=self._callback_estado
-        )
+        # Crear clasificador con callbacks unificados; si el worker se
+        # reutiliza, se resetea el existente en lugar de crear otro
+        if self.clasificador is None:
+            self.clasificador = ClasificadorDocumentos(
+                callback_mensaje=self._callback_mensaje,
+                callback_progreso=self._callback_progreso,
+                callback_estado=self._callback_estado
+            )
+        else:
+            self.clasificador.resetear()
+        self._ultimo_porcentaje = -1
+    
+    def establecer_niveles_visibles(self, niveles):
+        """
+        Define qué niveles de mensaje se muestran en el log de la GUI.
+        Los mensajes de otros niveles se descartan en el callback, sin
+        encolarlos ni formatearlos.
+        
+        Args:
+            niveles: Iterable de NivelMensaje a mostrar
+        """
+        self._niveles_visibles = frozenset(niveles)
     
     def _callback_mensaje(self, fase: FaseProceso, nivel: NivelMensaje, texto: str):
         """
         Callback unificado para mensajes.
         El backend ahora emite la fase explícitamente.
         
+        Se ejecuta en el hilo del backend, por lo que solo encola el mensaje:
+        el formato y el envío a la GUI se hacen en drenar_log.
+        
         Args:
             fase: Fase actual del proceso (emitida por el backend)
             nivel: Nivel del mensaje (info, success, warning, error)
             texto: Contenido del mensaje
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Iconos según nivel
-        iconos = {
-            NivelMensaje.DEBUG: "🔍",
-            NivelMensaje.INFO: "ℹ️",
-            NivelMensaje.SUCCESS: "✅",
-            NivelMensaje.WARNING: "⚠️",
-            NivelMensaje.ERROR: "❌"
-        }
-        icono = iconos.get(nivel, "ℹ️")
-        
-        msg_formateado = f"[{timestamp}] {icono} {texto}"
-        self.signal_log.emit(msg_formateado)
+        if nivel not in self._niveles_visibles:
+            return
+        self._lote_log.append((nivel, texto, time.time()))
     
     def _callback_progreso(self, actual: int, total: int, porcentaje: float):
         """
@@ -79,7 +128,17 @@ class ClasificadorWorker(QObject):
             total: Cantidad total
             porcentaje: Porcentaje completado
         """
-        if total > 0:
+        # El backend solo invoca el callback con total > 0.
+        # Emitir solo al cambiar el porcentaje entero o tras INTERVALO_PROGRESO_S
+        # (y siempre al llegar al total): evita una señal y un repintado de
+        # la barra por cada elemento en procesos con miles de elementos
+        porcentaje_entero = int(porcentaje)
+        ahora = time.monotonic()
+        if (porcentaje_entero != self._ultimo_porcentaje
+                or actual >= total
+                or ahora - self._ultimo_emit_progreso > self.INTERVALO_PROGRESO_S):
+            self._ultimo_porcentaje = porcentaje_entero
+            self._ultimo_emit_progreso = ahora
             self.signal_progreso.emit(actual, total, porcentaje)
     
     def _callback_estado(self, estado: EstadoProceso):
@@ -89,65 +148,90 @@ class ClasificadorWorker(QObject):
         Args:
             estado: Nuevo estado del proceso
         """
-        # Mapeo de estados a mensajes
-        mensajes_estado = {
-            EstadoProceso.DETENIDO: "⏹️ Proceso detenido",
-            EstadoProceso.INICIANDO: "🚀 Iniciando proceso...",
-            EstadoProceso.CLASIFICANDO: "📂 Clasificando documentos...",
-            EstadoProceso.PAUSADO: "⏸️ Proceso pausado",
-            EstadoProceso.COMPLETADO: "✅ Proceso completado exitosamente",
-            EstadoProceso.ERROR: "❌ Error en el proceso",
-            EstadoProceso.CANCELADO: "🛑 Proceso cancelado"
-        }
+        mensaje = MENSAJES_ESTADO.get(estado, estado.value)
+        self._lote_log.append((None, mensaje, time.time()))
+    
+    def _marca_tiempo(self, instante: float) -> str:
+        """
+        Hora del instante en formato HH:MM:SS. Se formatea una sola vez por
+        segundo (la resolución mostrada) y se reutiliza para los mensajes siguientes.
+        """
+        segundo = int(instante)
+        if segundo != self._ultimo_segundo:
+            self._ultima_marca = time.strftime("%H:%M:%S", time.localtime(segundo))
+            self._ultimo_segundo = segundo
+        return self._ultima_marca
+    
+    def _encolar_linea(self, texto: str):
+        """Encola una línea que se muestra tal cual (sin hora ni icono)"""
+        self._lote_log.append((None, texto, None))
+    
+    def _formatear_mensaje(self, nivel: NivelMensaje, texto: str, instante: float) -> str:
+        """
+        Da formato a un mensaje encolado.
+        
+        Args:
+            nivel: Nivel del mensaje (None para estados y líneas sin icono)
+            texto: Contenido del mensaje
+            instante: time.time() al encolar (None para líneas sin hora)
+        """
+        if instante is None:
+            return texto
         
-        mensaje = mensajes_estado.get(estado, estado.value)
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        msg_completo = f"[{timestamp}] {mensaje}"
+        timestamp = self._marca_tiempo(instante)
+        if nivel is None:
+            return f"[{timestamp}] {texto}"
         
-        self.signal_log.emit(msg_completo)
+        icono = ICONOS.get(nivel, "ℹ️")
+        
+        return f"[{timestamp}] {icono} {texto}"
+    
+    def drenar_log(self):
+        """
+        Formatea los mensajes pendientes y los envía en un solo emit (una
+        línea por mensaje). Debe llamarse desde el hilo de la GUI (QTimer
+        cada INTERVALO_LOG_MS y una última vez al terminar el proceso).
+        """
+        lineas = []
+        while True:
+            try:
+                nivel, texto, instante = self._lote_log.popleft()
+            except IndexError:
+                break
+            lineas.append(self._formatear_mensaje(nivel, texto, instante))
+        
+        if lineas:
+            self.signal_log.emit("\n".join(lineas))
     
     def ejecutar(self):
         """Ejecuta el proceso completo de clasificación"""
         try:
-            self.signal_log.emit("📂 Iniciando proceso de clasificación...")
-            self.signal_log.emit("")
+            self._encolar_linea("📂 Iniciando proceso de clasificación...")
+            self._encolar_linea("")
             
             # Ejecutar clasificación
             estadisticas = self.clasificador.clasificar(self.carpeta)
             
-            # Mostrar resumen final
-            self.signal_log.emit("")
-            self.signal_log.emit("=" * 60)
-            self.signal_log.emit("🎉 PROCESO COMPLETADO")
-            self.signal_log.emit("=" * 60)
-            self.signal_log.emit("📊 Estadísticas:\n")
-            self.signal_log.emit(f"   📄 Total de archivos: {estadisticas.get('total', 0)}")
-            self.signal_log.emit(f"   ✅ Documentos firmados: {estadisticas.get('firmados', 0)}")
-            self.signal_log.emit(f"   ⚠️ Documentos sin firmar: {estadisticas.get('sin_firmar', 0)}")
-            self.signal_log.emit(f"   ⏭️ Archivos omitidos: {estadisticas.get('omitidos', 0)}")
-            
-            errores = estadisticas.get('errores', 0)
-            if errores > 0:
-                self.signal_log.emit(f"   ❌ Errores: {errores}")
-            
-            tiempo_total = estadisticas.get('tiempo_total', 0)
-            tiempo_str = f"{int(tiempo_total // 60)}min {tiempo_total % 60:.1f}s" if tiempo_total >= 60 else f"{tiempo_total:.1f}s"
-            self.signal_log.emit(f"   ⏱️ Tiempo total: {tiempo_str}")
-            self.signal_log.emit("\n" + "=" * 60)
+            # Mostrar resumen final (un solo bloque de texto)
+            valores = {**_VALORES_RESUMEN, **estadisticas}
+            errores = valores['errores']
+            valores['linea_errores'] = f"   ❌ Errores: {errores}\n" if errores > 0 else ""
+            valores['tiempo'] = formatear_duracion(valores['tiempo_total'])
+            self._encolar_linea(_PLANTILLA_RESUMEN.format_map(valores))
             
             self.signal_completado.emit(estadisticas)
             
         except ValueError as e:
             # Errores de validación
             error_msg = f"Error de validación: {str(e)}"
+            self._encolar_linea(f"❌ {error_msg}")
             self.signal_error.emit(error_msg)
-            self.signal_log.emit(f"❌ {error_msg}")
             
         except Exception as e:
             # Otros errores
             error_msg = f"Error durante la clasificación: {str(e)}"
+            self._encolar_linea(f"❌ {error_msg}")
             self.signal_error.emit(error_msg)
-            self.signal_log.emit(f"❌ {error_msg}")
     
     def cancelar(self):
         """Cancela el proceso"""
@@ -166,11 +250,9 @@ def validar_carpeta_clasificar(carpeta: str) -> tuple[bool, str]:
     Returns:
         (bool, str): (es_valido, mensaje_error)
     """
-    # Crear instancia temporal para validar
-    clasificador = ClasificadorDocumentos()
-    
+    # Validación sobre la clase, sin instanciar el backend
     try:
-        es_valido, mensaje = clasificador.validar_parametros(carpeta)
+        es_valido, mensaje = ClasificadorDocumentos.validar_parametros(carpeta)
         return es_valido, mensaje
     except Exception as e:
         return False, f"Error en validación: {str(e)}"
\ No newline at end of file
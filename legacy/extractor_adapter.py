@@ -1,3 +1,6 @@
+import time
+from collections import deque
+
 from PyQt5.QtCore import QObject, pyqtSignal
 from backend_extractor import (
     ExtractorAdjuntosOutlook,
@@ -5,7 +8,47 @@ from backend_extractor import (
     NivelMensaje,
     EstadoProceso
 )
-from datetime import datetime
+from adapter_base import (
+    ICONOS,
+    NIVELES_VISIBLES_POR_DEFECTO,
+    MENSAJES_ESTADO,
+    ENCABEZADO_RESUMEN,
+    PIE_RESUMEN,
+    formatear_duracion
+)
+
+
+# Log de la GUI al que se envían los mensajes de cada fase
+_LOG_POR_FASE = {
+    FaseProceso.INICIAL: "filtrado",
+    FaseProceso.FILTRADO: "filtrado",
+    FaseProceso.DESCARGA: "descarga",
+    FaseProceso.FINALIZACION: "descarga"
+}
+
+
+# Resumen final; las líneas opcionales (fallidos/omitidos) llegan ya formateadas
+_PLANTILLA_RESUMEN = (
+    ENCABEZADO_RESUMEN
+    + "   📧 Correos procesados: {correos_procesados}\n"
+    "   📎 Adjuntos descargados: {adjuntos_descargados}\n"
+    "{lineas_opcionales}"
+    "   💾 Tamaño total: {tamaño_total_mb:.2f} MB\n"
+    "   📈 Tasa de éxito: {tasa_exito:.1f}%\n"
+    + PIE_RESUMEN
+)
+
+# Valores por defecto de las estadísticas usadas en el resumen
+_VALORES_RESUMEN = {
+    'correos_procesados': 0,
+    'adjuntos_descargados': 0,
+    'adjuntos_fallidos': 0,
+    'adjuntos_omitidos': 0,
+    'tamaño_total_mb': 0,
+    'tasa_exito': 0,
+    'tiempo_total': 0
+}
+
 
 class ExtractorWorker(QObject):
     """
@@ -25,10 +68,29 @@ class ExtractorWorker(QObject):
     signal_completado = pyqtSignal(dict)       # Estadísticas finales
     signal_error = pyqtSignal(str)             # Errores
     
+    # Intervalo (ms) con el que la GUI debe llamar a drenar_log (~30 Hz)
+    INTERVALO_LOG_MS = 33
+    # Líneas que conservan la cola y los logs de la GUI; las más antiguas se
+    # descartan (la GUI tampoco las mostraría)
+    MAX_LINEAS_LOG = 5000
+    # Tiempo mínimo (s) entre emisiones de progreso con el mismo porcentaje
+    INTERVALO_PROGRESO_S = 0.1
+    
     def __init__(self):
         super().__init__()
         self.extractor = None
         self.params = None
+        # Mensajes pendientes (log, nivel, texto, instante); el backend solo
+        # encola y la GUI los formatea y muestra al drenarlos. deque acotada:
+        # append/popleft son atómicos (los hilos de descarga del backend
+        # también envían mensajes) y la memoria no crece si la GUI se retrasa
+        self._lote_log = deque(maxlen=self.MAX_LINEAS_LOG)
+        self._fase_anterior = None
+        self._ultimo_segundo = -1
+        self._ultima_marca = ""
+        self._ultimo_porcentaje = -1
+        self._ultimo_emit_progreso = 0.0
+        self._niveles_visibles = NIVELES_VISIBLES_POR_DEFECTO
         
     def inicializar(self, params: dict):
         """
@@ -39,53 +101,58 @@ class ExtractorWorker(QObject):
         """
         self.params = params
         
-        # Crear extractor con callbacks unificados
-        self.extractor = ExtractorAdjuntosOutlook(
-            callback_mensaje=self._callback_mensaje,
-            callback_progreso=self._callback_progreso,
-            callback_estado=self._callback_estado
-        )
+        # Crear extractor con callbacks unificados; si el worker se
+        # reutiliza, se resetea el existente en lugar de crear otro
+        if self.extractor is None:
+            self.extractor = ExtractorAdjuntosOutlook(
+                callback_mensaje=self._callback_mensaje,
+                callback_progreso=self._callback_progreso,
+                callback_estado=self._callback_estado
+            )
+        else:
+            self.extractor.resetear()
+        self._fase_anterior = None
+        self._ultimo_porcentaje = -1
+        
+        self._encolar_linea("filtrado", "✓ Extractor inicializado correctamente")
+    
+    def establecer_niveles_visibles(self, niveles):
+        """
+        Define qué niveles de mensaje se muestran en el log de la GUI.
+        Los mensajes de otros niveles se descartan en el callback, sin
+        encolarlos ni formatearlos.
         
-        self.signal_log_filtrado.emit("✓ Extractor inicializado correctamente")
+        Args:
+            niveles: Iterable de NivelMensaje a mostrar
+        """
+        self._niveles_visibles = frozenset(niveles)
     
     def _callback_mensaje(self, fase: FaseProceso, nivel: NivelMensaje, texto: str):
         """
         Callback unificado para mensajes.
         El backend ahora emite la fase explícitamente, no hay que adivinarla.
         
+        Se ejecuta en el hilo del backend, por lo que solo encola el mensaje:
+        el formato y el envío a la GUI se hacen en drenar_log.
+        
         Args:
             fase: Fase actual del proceso (emitida por el backend)
             nivel: Nivel del mensaje (info, success, warning, error)
             texto: Contenido del mensaje
         """
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Iconos según nivel
-        iconos = {
-            NivelMensaje.DEBUG: "🔍",
-            NivelMensaje.INFO: "ℹ️",
-            NivelMensaje.SUCCESS: "✅",
-            NivelMensaje.WARNING: "⚠️",
-            NivelMensaje.ERROR: "❌"
-        }
-        icono = iconos.get(nivel, "ℹ️")
+        # Detectar cambio de fase a DESCARGA para emitir señal especial (la
+        # GUI escribe el separador en el log de filtrado). Se comprueba antes
+        # del filtro de nivel para no perder el cambio de fase
+        if fase is not self._fase_anterior:
+            self._fase_anterior = fase
+            if fase is FaseProceso.DESCARGA:
+                self.signal_inicio_descarga.emit()
         
-        msg_formateado = f"[{timestamp}] {icono} {texto}"
+        if nivel not in self._niveles_visibles:
+            return
         
         # Routing según fase (ahora el backend nos dice en qué fase estamos)
-        if fase == FaseProceso.DESCARGA or fase == FaseProceso.FINALIZACION:
-            self.signal_log_descarga.emit(msg_formateado)
-        else:
-            # INICIAL, FILTRADO
-            self.signal_log_filtrado.emit(msg_formateado)
-        
-        # Detectar cambio de fase a DESCARGA para emitir señal especial
-        if fase == FaseProceso.DESCARGA and texto.startswith("Iniciando fase"):
-            self.signal_log_filtrado.emit("")
-            self.signal_log_filtrado.emit("=" * 60)
-            self.signal_log_filtrado.emit("✅ Filtrado completado. Iniciando descarga...")
-            self.signal_log_filtrado.emit("=" * 60)
-            self.signal_inicio_descarga.emit()
+        self._lote_log.append((_LOG_POR_FASE.get(fase, "filtrado"), nivel, texto, time.time()))
     
     def _callback_progreso(self, actual: int, total: int, porcentaje: float):
         """
@@ -97,7 +164,17 @@ class ExtractorWorker(QObject):
             total: Cantidad total
             porcentaje: Porcentaje completado
         """
-        if total > 0:
+        # El backend solo invoca el callback con total > 0.
+        # Emitir solo al cambiar el porcentaje entero o tras INTERVALO_PROGRESO_S
+        # (y siempre al llegar al total): evita una señal y un repintado de
+        # la barra por cada elemento en procesos con miles de elementos
+        porcentaje_entero = int(porcentaje)
+        ahora = time.monotonic()
+        if (porcentaje_entero != self._ultimo_porcentaje
+                or actual >= total
+                or ahora - self._ultimo_emit_progreso > self.INTERVALO_PROGRESO_S):
+            self._ultimo_porcentaje = porcentaje_entero
+            self._ultimo_emit_progreso = ahora
             self.signal_progreso.emit(actual, total, porcentaje)
     
     def _callback_estado(self, estado: EstadoProceso):
@@ -107,24 +184,71 @@ class ExtractorWorker(QObject):
         Args:
             estado: Nuevo estado del proceso
         """
-        # Mapeo de estados a mensajes
-        mensajes_estado = {
-            EstadoProceso.DETENIDO: "⏹️ Proceso detenido",
-            EstadoProceso.INICIANDO: "🚀 Iniciando proceso...",
-            EstadoProceso.FILTRANDO: "🔍 Filtrando correos en Outlook...",
-            EstadoProceso.PROCESANDO: "📦 Procesando adjuntos...",
-            EstadoProceso.PAUSADO: "⏸️ Proceso pausado",
-            EstadoProceso.COMPLETADO: "✅ Proceso completado exitosamente",
-            EstadoProceso.ERROR: "❌ Error en el proceso",
-            EstadoProceso.CANCELADO: "🛑 Proceso cancelado"
-        }
-        
-        mensaje = mensajes_estado.get(estado, estado.value)
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        msg_completo = f"[{timestamp}] {mensaje}"
+        mensaje = MENSAJES_ESTADO.get(estado, estado.value)
         
         # Los estados se emiten al log de filtrado (son estados generales)
-        self.signal_log_filtrado.emit(msg_completo)
+        self._lote_log.append(("filtrado", None, mensaje, time.time()))
+    
+    def _marca_tiempo(self, instante: float) -> str:
+        """
+        Hora del instante en formato HH:MM:SS. Se formatea una sola vez por
+        segundo (la resolución mostrada) y se reutiliza para los mensajes siguientes.
+        """
+        segundo = int(instante)
+        if segundo != self._ultimo_segundo:
+            self._ultima_marca = time.strftime("%H:%M:%S", time.localtime(segundo))
+            self._ultimo_segundo = segundo
+        return self._ultima_marca
+    
+    def _encolar_linea(self, log: str, texto: str):
+        """Encola una línea que se muestra tal cual (sin hora ni icono)"""
+        self._lote_log.append((log, None, texto, None))
+    
+    def _formatear_mensaje(self, nivel: NivelMensaje, texto: str, instante: float) -> str:
+        """
+        Da formato a un mensaje encolado.
+        
+        Args:
+            nivel: Nivel del mensaje (None para estados y líneas sin icono)
+            texto: Contenido del mensaje
+            instante: time.time() al encolar (None para líneas sin hora)
+        """
+        if instante is None:
+            return texto
+        
+        timestamp = self._marca_tiempo(instante)
+        if nivel is None:
+            return f"[{timestamp}] {texto}"
+        
+        icono = ICONOS.get(nivel, "ℹ️")
+        
+        return f"[{timestamp}] {icono} {texto}"
+    
+    def drenar_log(self):
+        """
+        Formatea los mensajes pendientes y los envía: un emit por cada tramo
+        consecutivo de mensajes del mismo log, conservando el orden. Debe
+        llamarse desde el hilo de la GUI (QTimer cada INTERVALO_LOG_MS y una
+        última vez al terminar el proceso).
+        """
+        señales = {
+            "filtrado": self.signal_log_filtrado,
+            "descarga": self.signal_log_descarga
+        }
+        log_actual, lineas = None, []
+        while True:
+            try:
+                log, nivel, texto, instante = self._lote_log.popleft()
+            except IndexError:
+                break
+            if log != log_actual and lineas:
+                señales[log_actual].emit("\n".join(lineas))
+                lineas = []
+            log_actual = log
+            lineas.append(self._formatear_mensaje(nivel, texto, instante))
+        
+        if lineas:
+            señales[log_actual].emit("\n".join(lineas))
     
     def ejecutar(self):
         """Ejecuta el proceso completo de extracción"""
@@ -133,8 +257,8 @@ class ExtractorWorker(QObject):
                 self.signal_error.emit("No se han configurado los parámetros de extracción")
                 return
             
-            self.signal_log_filtrado.emit("🔍 Iniciando proceso de extracción...")
-            self.signal_log_filtrado.emit("")
+            self._encolar_linea("filtrado", "🔍 Iniciando proceso de extracción...")
+            self._encolar_linea("filtrado", "")
             
             # Ejecutar extracción
             estadisticas = self.extractor.extraer_adjuntos(
@@ -145,40 +269,30 @@ class ExtractorWorker(QObject):
                 fecha_fin=self.params['fecha_fin']
             )
             
-            # Mostrar resumen final
-            self.signal_log_descarga.emit("")
-            self.signal_log_descarga.emit("=" * 60)
-            self.signal_log_descarga.emit("🎉 PROCESO COMPLETADO")
-            self.signal_log_descarga.emit("=" * 60)
-            self.signal_log_descarga.emit("📊 Estadísticas:\n")
-            self.signal_log_descarga.emit(f"   📧 Correos procesados: {estadisticas.get('correos_procesados', 0)}")
-            self.signal_log_descarga.emit(f"   📎 Adjuntos descargados: {estadisticas.get('adjuntos_descargados', 0)}")
-            
-            adjuntos_fallidos = estadisticas.get('adjuntos_fallidos', 0)
-            if adjuntos_fallidos > 0:
-                self.signal_log_descarga.emit(f"   ⚠️ Adjuntos fallidos: {adjuntos_fallidos}")
-            
-            self.signal_log_descarga.emit(f"   💾 Tamaño total: {estadisticas.get('tamaño_total_mb', 0):.2f} MB")
-            self.signal_log_descarga.emit(f"   📈 Tasa de éxito: {estadisticas.get('tasa_exito', 0):.1f}%")
-            
-            tiempo_total = estadisticas.get('tiempo_total', 0)
-            tiempo_str = f"{int(tiempo_total // 60)}min {tiempo_total % 60:.1f}s" if tiempo_total >= 60 else f"{tiempo_total:.1f}s"
-            self.signal_log_descarga.emit(f"   ⏱️ Tiempo total: {tiempo_str}")
-            self.signal_log_descarga.emit("\n" + "=" * 60)
+            # Mostrar resumen final (un solo bloque de texto)
+            valores = {**_VALORES_RESUMEN, **estadisticas}
+            opcionales = ""
+            if valores['adjuntos_fallidos'] > 0:
+                opcionales += f"   ⚠️ Adjuntos fallidos: {valores['adjuntos_fallidos']}\n"
+            if valores['adjuntos_omitidos'] > 0:
+                opcionales += f"   ⏭️ Adjuntos omitidos: {valores['adjuntos_omitidos']}\n"
+            valores['lineas_opcionales'] = opcionales
+            valores['tiempo'] = formatear_duracion(valores['tiempo_total'])
+            self._encolar_linea("descarga", _PLANTILLA_RESUMEN.format_map(valores))
             
             self.signal_completado.emit(estadisticas)
             
         except ValueError as e:
             # Errores de validación
             error_msg = f"Error de validación: {str(e)}"
+            self._encolar_linea("filtrado", f"❌ {error_msg}")
             self.signal_error.emit(error_msg)
-            self.signal_log_filtrado.emit(f"❌ {error_msg}")
             
         except Exception as e:
             # Otros errores
             error_msg = f"Error durante la extracción: {str(e)}"
+            self._encolar_linea("descarga", f"❌ {error_msg}")
             self.signal_error.emit(error_msg)
-            self.signal_log_descarga.emit(f"❌ {error_msg}")
     
     def pausar(self):
         """Pausa el proceso"""
@@ -211,12 +325,11 @@ def validar_parametros_extractor(frases, destino, outlook_folder, fecha_inicio,
     Returns:
         (bool, str): (es_valido, mensaje_error)
     """
-    # Crear instancia temporal para validar
-    extractor = ExtractorAdjuntosOutlook()
-    
+    # Validación sobre la clase, sin instanciar el backend (el aviso de
+    # frases vacías lo emite el backend al ejecutar)
     try:
-        es_valido, mensaje = extractor.validar_parametros(
-            frases, destino, outlook_folder, fecha_inicio, fecha_fin
+        es_valido, mensaje = ExtractorAdjuntosOutlook.validar_datos(
+            destino, outlook_folder, fecha_inicio, fecha_fin
         )
         return es_valido, mensaje
     except Exception as e:
@@ -1,12 +1,14 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+import pythoncom
 import win32com.client
 import json
 import os
 import sys
 import time
 import winsound
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import ctypes
 from ctypes import wintypes
@@ -26,12 +28,54 @@ from config.config_manager import ConfigManager
 # ⭐ Importar Estilos (desde carpeta raíz/ui/)
 from ui.estilos import Estilos
 
+# Los pitidos se reproducen en un hilo propio: winsound.Beep bloquea durante
+# toda su duración (hasta 500 ms) y congelaría la GUI. Un solo hilo los
+# reproduce en orden, sin solaparse
+_EJECUTOR_SONIDO = ThreadPoolExecutor(max_workers=1, thread_name_prefix="beep")
+
+
+def beep(frecuencia: int, duracion_ms: int):
+    """Reproduce un pitido sin bloquear el hilo que lo pide"""
+    _EJECUTOR_SONIDO.submit(winsound.Beep, frecuencia, duracion_ms)
+
+
+# Parpadeo en la barra de tareas (FlashWindowEx): estructura y prototipo se
+# declaran una sola vez
+FLASHW_ALL = 3  # Parpadea tanto el icono como el caption
+FLASHW_TIMERNOFG = 12  # Parpadea hasta que la ventana vuelva al frente
+
+
+class FLASHWINFO(ctypes.Structure):
+    _fields_ = [
+        ('cbSize', wintypes.UINT),
+        ('hwnd', wintypes.HANDLE),
+        ('dwFlags', wintypes.DWORD),
+        ('uCount', wintypes.UINT),
+        ('dwTimeout', wintypes.DWORD)
+    ]
+
+
+_FlashWindowEx = ctypes.windll.user32.FlashWindowEx
+_FlashWindowEx.argtypes = [ctypes.POINTER(FLASHWINFO)]
+_FlashWindowEx.restype = wintypes.BOOL
+
+
 class AplicacionCorreosPyQt(QMainWindow):
     def __init__(self):
         super().__init__()
         
         # ⭐ Cargar configuración usando el nuevo ConfigManager
         self.config_manager = ConfigManager()
+        self._tema_actual = None
+        self._app_icon = None
+        # Namespace MAPI y carpetas de Outlook ya enumeradas (se reutilizan
+        # entre aperturas del selector hasta que el usuario pulse Refrescar)
+        self._outlook_namespace = None
+        self._outlook_cache = {}
+        # Workers de descarga y clasificación (se crean en su primer uso y se
+        # reutilizan entre ejecuciones junto con su QThread)
+        self.worker_descarga = None
+        self.worker_clasificar = None
 
         # ⭐ Configurar icono de la aplicación
         self._configurar_icono()
@@ -63,16 +107,32 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.tabs = QTabWidget()
         main_layout.addWidget(self.tabs)
         
-        # Crear pestañas
+        # Crear pestañas. La de clasificación se construye la primera vez
+        # que se abre: hasta entonces es un contenedor vacío
         self.tabs.addTab(self.crear_pestana_descarga(), "📥 Descarga de Adjuntos")
-        self.tabs.addTab(self.crear_pestana_clasificador(), "📂 Clasificar Documentos")
-        
+        self._contenedor_clasificador = QWidget()
+        layout_contenedor = QVBoxLayout(self._contenedor_clasificador)
+        layout_contenedor.setContentsMargins(0, 0, 0, 0)
+        self.tabs.addTab(self._contenedor_clasificador, "📂 Clasificar Documentos")
+        self._clasificador_construido = False
+        self.tabs.currentChanged.connect(self._construir_pestana_pendiente)
+        
+    def _construir_pestana_pendiente(self, indice):
+        """Construye la pestaña de clasificación al abrirla por primera vez"""
+        if self._clasificador_construido or self.tabs.widget(indice) is not self._contenedor_clasificador:
+            return
+        self._clasificador_construido = True
+        self._contenedor_clasificador.layout().addWidget(self.crear_pestana_clasificador())
+    
     def _configurar_icono(self):
     
         icon_path = self.config_manager.get_icon_path()
         if icon_path and icon_path.exists():
             try:
-                self.setWindowIcon(QIcon(str(icon_path)))
+                # QIcon decodifica el .ico al construirse: se crea una sola vez
+                if self._app_icon is None:
+                    self._app_icon = QIcon(str(icon_path))
+                self.setWindowIcon(self._app_icon)
                 print(f"✅ Icono cargado desde: {icon_path}")
             except Exception as e:
                 print(f"⚠️ Error al cargar icono: {e}")
@@ -102,7 +162,11 @@ class AplicacionCorreosPyQt(QMainWindow):
     
     def aplicar_tema(self, tema):
         """Aplica el estilo del tema seleccionado"""
+        # Reaplicar la misma hoja de estilo recalcula el estilo de todos los widgets
+        if tema == self._tema_actual:
+            return
         self.setStyleSheet(Estilos.obtener_estilo(tema))
+        self._tema_actual = tema
     
     # ==================== PESTAÑA DESCARGA ====================
     
@@ -202,8 +266,10 @@ class AplicacionCorreosPyQt(QMainWindow):
         label_filtrado.setFont(QFont("Segoe UI", 11, QFont.Bold))
         layout_progreso.addWidget(label_filtrado)
         
-        self.log_filtrado_descarga = QTextEdit()
+        # QPlainTextEdit: texto plano por líneas, sin el layout de texto enriquecido
+        self.log_filtrado_descarga = QPlainTextEdit()
         self.log_filtrado_descarga.setReadOnly(True)
+        self.log_filtrado_descarga.document().setMaximumBlockCount(ExtractorWorker.MAX_LINEAS_LOG)
         self.log_filtrado_descarga.setMaximumHeight(250)
         self.log_filtrado_descarga.setPlaceholderText("Los logs de filtrado aparecerán aquí...")
         layout_progreso.addWidget(self.log_filtrado_descarga)
@@ -219,8 +285,9 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.progress_descarga.setEnabled(False)
         layout_progreso.addWidget(self.progress_descarga)
         
-        self.log_descarga = QTextEdit()
+        self.log_descarga = QPlainTextEdit()
         self.log_descarga.setReadOnly(True)
+        self.log_descarga.document().setMaximumBlockCount(ExtractorWorker.MAX_LINEAS_LOG)
         self.log_descarga.setPlaceholderText("Los logs de descarga aparecerán aquí cuando inicie la fase 2...")
         layout_progreso.addWidget(self.log_descarga)
         
@@ -258,14 +325,11 @@ class AplicacionCorreosPyQt(QMainWindow):
         destino = self.txt_destino.text().strip()
         outlook_folder = self.txt_bandeja.text().strip()
         
-        fecha_inicio = datetime.combine(
-            self.fecha_inicio.date().toPyDate(),
-            datetime.min.time()
-        )
-        fecha_fin = datetime.combine(
-            self.fecha_fin.date().toPyDate(),
-            datetime.max.time()
-        )
+        # Rango de días completos, construido directamente desde los QDate
+        qd_inicio = self.fecha_inicio.date()
+        qd_fin = self.fecha_fin.date()
+        fecha_inicio = datetime(qd_inicio.year(), qd_inicio.month(), qd_inicio.day())
+        fecha_fin = datetime(qd_fin.year(), qd_fin.month(), qd_fin.day(), 23, 59, 59, 999999)
         
         # Validar
         es_valido, mensaje_error = validar_parametros_extractor(
@@ -282,20 +346,11 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.progress_descarga.setValue(0)
         self.progress_descarga.setEnabled(False)
         
-        # Crear worker y thread
-        self.thread_descarga = QThread()
-        self.worker_descarga = ExtractorWorker()
-        self.worker_descarga.moveToThread(self.thread_descarga)
-        
-        # Conectar señales
-        self.worker_descarga.signal_log_filtrado.connect(self.actualizar_log_filtrado)
-        self.worker_descarga.signal_log_descarga.connect(self.actualizar_log_descarga)
-        self.worker_descarga.signal_progreso.connect(self.actualizar_progreso_descarga)
-        self.worker_descarga.signal_inicio_descarga.connect(self.activar_fase_descarga)
-        self.worker_descarga.signal_completado.connect(self.descarga_completada)
-        self.worker_descarga.signal_error.connect(self.descarga_error)
-        
-        self.thread_descarga.started.connect(self.worker_descarga.ejecutar)
+        # El worker y su hilo se crean en la primera descarga y se reutilizan
+        # en las siguientes (inicializar resetea el extractor existente)
+        if self.worker_descarga is None:
+            self._crear_worker_descarga()
+        self.timer_log_descarga.start(ExtractorWorker.INTERVALO_LOG_MS)
         
         # Inicializar
         params = {
@@ -313,25 +368,52 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.btn_cancelar_descarga.setEnabled(True)
         
         # Iniciar
-        winsound.Beep(800, 200)  # Inicio del proceso
+        beep(800, 200)  # Inicio del proceso
         self.thread_descarga.start()
     
+    def _crear_worker_descarga(self):
+        """Crea el worker de descarga, su hilo y el timer del log (una sola vez)"""
+        self.thread_descarga = QThread()
+        self.worker_descarga = ExtractorWorker()
+        self.worker_descarga.moveToThread(self.thread_descarga)
+        
+        # Conectar señales
+        self.worker_descarga.signal_log_filtrado.connect(self.actualizar_log_filtrado)
+        self.worker_descarga.signal_log_descarga.connect(self.actualizar_log_descarga)
+        self.worker_descarga.signal_progreso.connect(self.actualizar_progreso_descarga)
+        self.worker_descarga.signal_inicio_descarga.connect(self.activar_fase_descarga)
+        self.worker_descarga.signal_completado.connect(self.descarga_completada)
+        self.worker_descarga.signal_error.connect(self.descarga_error)
+        
+        self.thread_descarga.started.connect(self.worker_descarga.ejecutar)
+        # La UI se restablece cuando el hilo termina de verdad, sin bloquear
+        # la GUI con wait() en los slots de fin/error/cancelación
+        self.thread_descarga.finished.connect(self._restablecer_ui_descarga)
+        
+        # El worker solo encola los mensajes del backend; se formatean y
+        # muestran desde el hilo de la GUI
+        self.timer_log_descarga = QTimer(self)
+        self.timer_log_descarga.timeout.connect(self.drenar_log_descarga)
+    
+    def drenar_log_descarga(self):
+        """Vuelca al log los mensajes pendientes del worker de descarga"""
+        self.worker_descarga.drenar_log()
+    
     def actualizar_log_filtrado(self, mensaje):
         """Actualiza log de filtrado"""
-        self.log_filtrado_descarga.append(mensaje)
+        self.log_filtrado_descarga.appendPlainText(mensaje)
         scrollbar = self.log_filtrado_descarga.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
     
     def actualizar_log_descarga(self, mensaje):
         """Actualiza log de descarga"""
-        self.log_descarga.append(mensaje)
+        self.log_descarga.appendPlainText(mensaje)
         scrollbar = self.log_descarga.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
     
     def actualizar_progreso_descarga(self, actual, total, porcentaje):
         """Actualiza barra de progreso"""
-        self.progress_descarga.setMaximum(total)
-        self.progress_descarga.setValue(actual)
+        self._actualizar_barra(self.progress_descarga, actual, total)
     
     def activar_fase_descarga(self):
         """Activa la fase de descarga"""
@@ -339,21 +421,30 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.progress_descarga.setValue(0)
         self.btn_pausar_descarga.setEnabled(True)
         
-        self.log_filtrado_descarga.append("")
-        self.log_filtrado_descarga.append("=" * 60)
-        self.log_filtrado_descarga.append("✅ Filtrado completado. Iniciando descarga...")
-        winsound.Beep(1000, 150)  # Cambio de fase: filtrado → descarga
-        self.log_filtrado_descarga.append("=" * 60)
+        # La señal llega directa y los últimos mensajes de filtrado siguen en la
+        # cola del worker: volcarlos antes del separador para no desordenarlos
+        self.drenar_log_descarga()
+        self.log_filtrado_descarga.appendPlainText("\n".join([
+            "",
+            "=" * 60,
+            "✅ Filtrado completado. Iniciando descarga...",
+            "=" * 60
+        ]))
+        beep(1000, 150)  # Cambio de fase: filtrado → descarga
     
-    def descarga_completada(self, estadisticas):
-        """Proceso completado"""
-        self.thread_descarga.quit()
-        self.thread_descarga.wait()
+    def _restablecer_ui_descarga(self):
+        """El hilo de descarga terminó: último volcado del log y botones a reposo"""
+        self.timer_log_descarga.stop()
+        self.drenar_log_descarga()
         
         self.btn_procesar.setEnabled(True)
         self.btn_pausar_descarga.setEnabled(False)
         self.btn_cancelar_descarga.setEnabled(False)
-        winsound.Beep(1400, 150)
+    
+    def descarga_completada(self, estadisticas):
+        """Proceso completado"""
+        self.thread_descarga.quit()
+        beep(1400, 150)
         self.flash_taskbar()
         
         # Ya NO agregamos las estadísticas aquí porque el adapter ya las mostró
@@ -362,13 +453,8 @@ class AplicacionCorreosPyQt(QMainWindow):
     def descarga_error(self, mensaje):
         """Error en descarga"""
         self.thread_descarga.quit()
-        self.thread_descarga.wait()
         
-        self.btn_procesar.setEnabled(True)
-        self.btn_pausar_descarga.setEnabled(False)
-        self.btn_cancelar_descarga.setEnabled(False)
-        
-        winsound.Beep(400, 500)
+        beep(400, 500)
         self.flash_taskbar()
         QMessageBox.critical(self, "Error", mensaje)
             
@@ -393,15 +479,25 @@ class AplicacionCorreosPyQt(QMainWindow):
         if respuesta == QMessageBox.Yes:
             self.worker_descarga.cancelar()
             self.thread_descarga.quit()
-            self.thread_descarga.wait()
             
-            self.btn_procesar.setEnabled(True)
+            # El resto de botones se restablece al terminar el hilo
             self.btn_pausar_descarga.setEnabled(False)
             self.btn_cancelar_descarga.setEnabled(False)
             self.progress_descarga.setEnabled(False)
     
     # ==================== MÉTODOS AUXILIARES ====================
     
+    @staticmethod
+    def _actualizar_barra(barra, actual, total):
+        """
+        Actualiza una barra de progreso tocando solo lo que cambió: el total
+        es fijo durante un proceso y setMaximum recalcula y repinta la barra
+        """
+        if barra.maximum() != total:
+            barra.setMaximum(total)
+        if barra.value() != actual:
+            barra.setValue(actual)
+    
     def seleccionar_carpeta_destino(self):
         """Selecciona carpeta de destino"""
         carpeta = QFileDialog.getExistingDirectory(
@@ -415,19 +511,80 @@ class AplicacionCorreosPyQt(QMainWindow):
             self.txt_destino.setText(carpeta)
     
     def seleccionar_bandeja_outlook(self):
-        """Abre diálogo para seleccionar bandeja de Outlook"""
+        """
+        Abre diálogo para seleccionar bandeja de Outlook.
+        El arranque de Outlook (lo lento de Dispatch) se hace en un hilo
+        aparte; el diálogo se abre cuando ese hilo termina.
+        """
+        if self._outlook_namespace is not None:
+            self._mostrar_dialogo_bandejas()
+            return
+        
+        hilo = getattr(self, '_hilo_conexion', None)
+        if hilo is not None and hilo.isRunning():
+            return
+        
+        self._dialogo_conexion = QProgressDialog("Conectando con Outlook...", None, 0, 0, self)
+        self._dialogo_conexion.setWindowTitle("Outlook")
+        self._dialogo_conexion.setWindowModality(Qt.WindowModal)
+        self._dialogo_conexion.setMinimumDuration(0)
+        self._dialogo_conexion.show()
+        
+        self._hilo_conexion = ConexionOutlookThread()
+        self._hilo_conexion.conectado.connect(self._abrir_dialogo_bandejas)
+        self._hilo_conexion.error.connect(self._error_conexion_outlook)
+        self._hilo_conexion.start()
+    
+    def _error_conexion_outlook(self, mensaje):
+        """No se pudo iniciar Outlook en segundo plano"""
+        self._dialogo_conexion.close()
+        QMessageBox.critical(
+            self,
+            "Error",
+            f"No se pudo conectar con Outlook:\n{mensaje}"
+        )
+    
+    def _abrir_dialogo_bandejas(self):
+        """Outlook ya está en ejecución: abre el selector de bandejas"""
+        self._dialogo_conexion.close()
         try:
+            # Los objetos COM pertenecen al hilo que los crea: el namespace
+            # que usa el diálogo se obtiene aquí, en el hilo de la GUI (con
+            # Outlook ya iniciado esta llamada es inmediata)
             outlook = win32com.client.Dispatch("Outlook.Application")
-            namespace = outlook.GetNamespace("MAPI")
-            
-            dialogo = DialogoBandejasOutlook(self, namespace)
+            self._outlook_namespace = outlook.GetNamespace("MAPI")
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                "Error",
+                f"No se pudo conectar con Outlook:\n{str(e)}"
+            )
+            return
+        finally:
+            # Con la GUI ya conectada (o fallida) el hilo suelta su referencia
+            self._hilo_conexion.liberar()
+        
+        self._mostrar_dialogo_bandejas()
+    
+    def _mostrar_dialogo_bandejas(self):
+        """Muestra el selector de bandejas con el namespace y las carpetas en caché"""
+        try:
+            dialogo = DialogoBandejasOutlook(self, self._outlook_namespace, self._outlook_cache)
             
             if dialogo.exec_() == QDialog.Accepted:
                 bandeja = dialogo.obtener_bandeja_seleccionada()
                 if bandeja:
                     self.txt_bandeja.setText(bandeja)
+            
+            if dialogo.tree.topLevelItemCount() == 0:
+                # Sin cuentas (p. ej. Outlook se cerró): reconectar la próxima vez
+                self._outlook_namespace = None
+                self._outlook_cache.clear()
         
         except Exception as e:
+            # Outlook pudo cerrarse: la próxima vez se vuelve a conectar
+            self._outlook_namespace = None
+            self._outlook_cache.clear()
             QMessageBox.critical(
                 self,
                 "Error",
@@ -495,8 +652,9 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.progress_clasificar = QProgressBar()
         layout_progreso.addWidget(self.progress_clasificar)
         
-        self.log_clasificar = QTextEdit()
+        self.log_clasificar = QPlainTextEdit()
         self.log_clasificar.setReadOnly(True)
+        self.log_clasificar.document().setMaximumBlockCount(ClasificadorWorker.MAX_LINEAS_LOG)
         layout_progreso.addWidget(self.log_clasificar)
         
         panel_progreso.setLayout(layout_progreso)
@@ -535,14 +693,27 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.log_clasificar.clear()
         self.progress_clasificar.setValue(0)
         
-        # Crear thread y worker
+        # El worker y su hilo se crean en la primera clasificación y se
+        # reutilizan en las siguientes (inicializar resetea el clasificador)
+        if self.worker_clasificar is None:
+            self._crear_worker_clasificar()
+        self.worker_clasificar.inicializar(carpeta)
+        self.timer_log_clasificar.start(ClasificadorWorker.INTERVALO_LOG_MS)
+        
+        # Deshabilitar botón
+        self.btn_clasificar.setEnabled(False)
+        self.btn_cancelar_clasificar.setEnabled(True)
+        
+        # Iniciar
+        self.thread_clasificar.start()
+        beep(800, 200)
+    
+    def _crear_worker_clasificar(self):
+        """Crea el worker de clasificación, su hilo y el timer del log (una sola vez)"""
         self.thread_clasificar = QThread()
         self.worker_clasificar = ClasificadorWorker()
         self.worker_clasificar.moveToThread(self.thread_clasificar)
         
-        # Configurar
-        self.worker_clasificar.inicializar(carpeta)
-        
         # Conectar señales
         self.worker_clasificar.signal_progreso.connect(self.actualizar_progreso_clasificar)
         self.worker_clasificar.signal_log.connect(self.actualizar_log_clasificar)
@@ -550,33 +721,40 @@ class AplicacionCorreosPyQt(QMainWindow):
         self.worker_clasificar.signal_error.connect(self.clasificacion_error)
         
         self.thread_clasificar.started.connect(self.worker_clasificar.ejecutar)
+        self.thread_clasificar.finished.connect(self._restablecer_ui_clasificacion)
         
-        # Deshabilitar botón
-        self.btn_clasificar.setEnabled(False)
-        self.btn_cancelar_clasificar.setEnabled(True)
-        
-        # Iniciar
-        self.thread_clasificar.start()
-        winsound.Beep(800, 200)
+        # El worker solo encola los mensajes del backend; se formatean y
+        # muestran desde el hilo de la GUI
+        self.timer_log_clasificar = QTimer(self)
+        self.timer_log_clasificar.timeout.connect(self.drenar_log_clasificar)
     
     def actualizar_progreso_clasificar(self, actual, total, porcentaje):
         """Actualiza barra de progreso"""
-        self.progress_clasificar.setMaximum(total)
-        self.progress_clasificar.setValue(actual)
+        self._actualizar_barra(self.progress_clasificar, actual, total)
+    
+    def drenar_log_clasificar(self):
+        """Vuelca al log los mensajes pendientes del worker de clasificación"""
+        self.worker_clasificar.drenar_log()
     
     def actualizar_log_clasificar(self, mensaje):
         """Actualiza log"""
-        self.log_clasificar.append(mensaje)
+        self.log_clasificar.appendPlainText(mensaje)
         scrollbar = self.log_clasificar.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
     
+    def _restablecer_ui_clasificacion(self):
+        """El hilo de clasificación terminó: último volcado del log y botones a reposo"""
+        self.timer_log_clasificar.stop()
+        self.drenar_log_clasificar()
+        
+        self.btn_clasificar.setEnabled(True)
+        self.btn_cancelar_clasificar.setEnabled(False)
+    
     def clasificacion_completada(self, estadisticas):
             """Clasificación completada"""
             self.thread_clasificar.quit()
-            self.thread_clasificar.wait()
-            
-            self.btn_clasificar.setEnabled(True)
-            self.btn_cancelar_clasificar.setEnabled(False)
+            # Volcar ya el resumen del worker para que quede antes del resumen final
+            self.drenar_log_clasificar()
             
             # Imprimir estadísticas en consola
             print("\n" + "="*50)
@@ -589,20 +767,22 @@ class AplicacionCorreosPyQt(QMainWindow):
             print(f"❌ Errores encontrados: {estadisticas['errores']}")
             print(f"⏱️  Tiempo total: {estadisticas['tiempo_total']:.2f} segundos")
             print("="*50 + "\n")
-            winsound.Beep(1400, 150)
+            beep(1400, 150)
             self.flash_taskbar()
 
             # Agregar resumen al log visual
-            self.log_clasificar.append("\n" + "="*50)
-            self.log_clasificar.append("📋 RESUMEN FINAL DE CLASIFICACIÓN")
-            self.log_clasificar.append("="*50)
-            self.log_clasificar.append(f"📊 Total procesados: {estadisticas['total']}")
-            self.log_clasificar.append(f"✅ Firmados: {estadisticas['firmados']}")
-            self.log_clasificar.append(f"⚠️  Sin firmar: {estadisticas['sin_firmar']}")
-            self.log_clasificar.append(f"⏭️  Omitidos: {estadisticas['omitidos']}")
-            self.log_clasificar.append(f"❌ Errores: {estadisticas['errores']}")
-            self.log_clasificar.append(f"⏱️  Tiempo: {estadisticas['tiempo_total']:.2f}s")
-            self.log_clasificar.append("="*50)
+            self.log_clasificar.appendPlainText("\n".join([
+                "\n" + "="*50,
+                "📋 RESUMEN FINAL DE CLASIFICACIÓN",
+                "="*50,
+                f"📊 Total procesados: {estadisticas['total']}",
+                f"✅ Firmados: {estadisticas['firmados']}",
+                f"⚠️  Sin firmar: {estadisticas['sin_firmar']}",
+                f"⏭️  Omitidos: {estadisticas['omitidos']}",
+                f"❌ Errores: {estadisticas['errores']}",
+                f"⏱️  Tiempo: {estadisticas['tiempo_total']:.2f}s",
+                "="*50
+            ]))
             
             # Scroll al final para ver el resumen
             scrollbar = self.log_clasificar.verticalScrollBar()
@@ -610,12 +790,8 @@ class AplicacionCorreosPyQt(QMainWindow):
     def clasificacion_error(self, mensaje):
         """Error en clasificación"""
         self.thread_clasificar.quit()
-        self.thread_clasificar.wait()
-        
-        self.btn_clasificar.setEnabled(True)
-        self.btn_cancelar_clasificar.setEnabled(False)
         
-        winsound.Beep(400, 500)
+        beep(400, 500)
         self.flash_taskbar()
         QMessageBox.critical(self, "Error", mensaje)
     
@@ -631,56 +807,81 @@ class AplicacionCorreosPyQt(QMainWindow):
         if respuesta == QMessageBox.Yes:
             self.worker_clasificar.cancelar()
             self.thread_clasificar.quit()
-            self.thread_clasificar.wait()
             
-            self.btn_clasificar.setEnabled(True)
+            # El botón de clasificar se rehabilita al terminar el hilo
             self.btn_cancelar_clasificar.setEnabled(False)
     def flash_taskbar(self):
             """Hace que el icono de la aplicación parpadee en la barra de tareas"""
             try:
-                # Constantes de Windows
-                FLASHW_ALL = 3  # Parpadea tanto el icono como el caption
-                FLASHW_TIMERNOFG = 12  # Parpadea hasta que la ventana vuelva al frente
-                
-                # Obtener el handle de la ventana
-                hwnd = int(self.winId())
-                
-                # Estructura FLASHWINFO
-                class FLASHWINFO(ctypes.Structure):
-                    _fields_ = [
-                        ('cbSize', wintypes.UINT),
-                        ('hwnd', wintypes.HANDLE),
-                        ('dwFlags', wintypes.DWORD),
-                        ('uCount', wintypes.UINT),
-                        ('dwTimeout', wintypes.DWORD)
-                    ]
-                
-                # Configurar el flash
-                flash_info = FLASHWINFO()
-                flash_info.cbSize = ctypes.sizeof(FLASHWINFO)
-                flash_info.hwnd = hwnd
-                flash_info.dwFlags = FLASHW_ALL | FLASHW_TIMERNOFG
-                flash_info.uCount = 5  # Número de parpadeos (5 veces)
-                flash_info.dwTimeout = 0  # Usar velocidad predeterminada del sistema
+                flash_info = FLASHWINFO(
+                    cbSize=ctypes.sizeof(FLASHWINFO),
+                    hwnd=int(self.winId()),
+                    dwFlags=FLASHW_ALL | FLASHW_TIMERNOFG,
+                    uCount=5,  # Número de parpadeos (5 veces)
+                    dwTimeout=0  # Usar velocidad predeterminada del sistema
+                )
                 
                 # Ejecutar el flash
-                ctypes.windll.user32.FlashWindowEx(ctypes.byref(flash_info))
+                _FlashWindowEx(ctypes.byref(flash_info))
             except Exception as e:
                 print(f"Error al hacer flash en taskbar: {e}")
 
+
+# ==================== CONEXIÓN OUTLOOK EN SEGUNDO PLANO ====================
+
+class ConexionOutlookThread(QThread):
+    """
+    Inicia Outlook y la sesión MAPI fuera del hilo de la GUI.
+    Solo sirve para que el arranque (que puede tardar segundos) no congele
+    la ventana: los objetos COM creados aquí no salen de este hilo.
+    
+    La referencia a Outlook.Application se mantiene hasta que la GUI se
+    conecta por su cuenta (liberar): si esta llamada fue la que arrancó
+    Outlook, soltarla antes podría cerrarlo y la GUI volvería a pagar el
+    arranque completo.
+    """
+    conectado = pyqtSignal()
+    error = pyqtSignal(str)
+    
+    # Tope de espera a la GUI antes de soltar Outlook (ms)
+    ESPERA_MAXIMA_MS = 30000
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._liberar = QSemaphore(0)
+    
+    def liberar(self):
+        """La GUI ya tiene su propio namespace: el hilo puede soltar Outlook"""
+        self._liberar.release()
+    
+    def run(self):
+        pythoncom.CoInitialize()
+        outlook = namespace = None
+        try:
+            outlook = win32com.client.Dispatch("Outlook.Application")
+            namespace = outlook.GetNamespace("MAPI")
+        except Exception as e:
+            self.error.emit(str(e))
+        else:
+            self.conectado.emit()
+            self._liberar.tryAcquire(1, self.ESPERA_MAXIMA_MS)
+        finally:
+            namespace = outlook = None
+            pythoncom.CoUninitialize()
+
+
 class DialogoBandejasOutlook(QDialog):
     """Diálogo para seleccionar bandejas de Outlook - Versión con Carga Diferida"""
     
-    def __init__(self, parent, namespace):
+    def __init__(self, parent, namespace, cache=None):
         super().__init__(parent)
         self.namespace = namespace
         self.bandeja_seleccionada = None
         
-        # Cache para evitar recargar carpetas ya expandidas
-        self.carpetas_cargadas = set()
-        
-        # Referencia a objetos de Outlook para lazy loading
-        self.outlook_folders_map = {}  # item_id -> outlook_folder_object
+        # Carpetas ya enumeradas por COM: ruta -> [(nombre, carpeta, tiene_subcarpetas)]
+        # (None = cuentas de nivel superior). Lo aporta la ventana principal
+        # para reutilizarlo entre aperturas del diálogo
+        self.cache = cache if cache is not None else {}
         
         self.inicializar_ui()
         self.cargar_bandejas_inicial()
@@ -729,6 +930,11 @@ class DialogoBandejasOutlook(QDialog):
         # Botones
         layout_botones = QHBoxLayout()
         
+        btn_refrescar = QPushButton("🔄 Refrescar")
+        btn_refrescar.setToolTip("Volver a leer las carpetas desde Outlook")
+        btn_refrescar.clicked.connect(self.refrescar)
+        btn_refrescar.setMinimumHeight(35)
+        
         btn_aceptar = QPushButton("✓ Aceptar")
         btn_aceptar.clicked.connect(self.aceptar)
         btn_aceptar.setMinimumHeight(35)
@@ -737,6 +943,7 @@ class DialogoBandejasOutlook(QDialog):
         btn_cancelar.clicked.connect(self.reject)
         btn_cancelar.setMinimumHeight(35)
         
+        layout_botones.addWidget(btn_refrescar)
         layout_botones.addStretch()
         layout_botones.addWidget(btn_aceptar)
         layout_botones.addWidget(btn_cancelar)
@@ -752,8 +959,10 @@ class DialogoBandejasOutlook(QDialog):
         try:
             QApplication.setOverrideCursor(Qt.WaitCursor)
             
-            for carpeta in self.namespace.Folders:
-                nombre_cuenta = str(carpeta.Name)
+            # Los items se crean fuera del árbol y se insertan de una vez
+            # (una sola actualización de la vista en lugar de una por cuenta)
+            cuentas = []
+            for nombre_cuenta, carpeta, tiene_subcarpetas in self._listar_carpetas(None, self.namespace):
                 
                 # Crear item de cuenta
                 item = QTreeWidgetItem([f"📧 {nombre_cuenta}", nombre_cuenta])
@@ -763,27 +972,18 @@ class DialogoBandejasOutlook(QDialog):
                 item.setToolTip(0, nombre_cuenta)
                 item.setToolTip(1, nombre_cuenta)
                 
-                # Guardar referencia al objeto Outlook para lazy loading
-                item_id = id(item)
-                self.outlook_folders_map[item_id] = carpeta
-                item.setData(0, Qt.UserRole + 1, item_id)  # Guardar ID en el item
+                # Guardar el objeto Outlook en el propio item para lazy loading
+                item.setData(0, Qt.UserRole + 1, carpeta)
                 
-                # Verificar si tiene subcarpetas
-                try:
-                    if carpeta.Folders.Count > 0:
-                        # Agregar un item "dummy" para mostrar el ➕ de expansión
-                        dummy = QTreeWidgetItem(["⏳ Cargando...", ""])
-                        item.addChild(dummy)
-                except:
-                    pass
+                if tiene_subcarpetas:
+                    # Agregar un item "dummy" para mostrar el ➕ de expansión
+                    dummy = QTreeWidgetItem(["⏳ Cargando...", ""])
+                    item.addChild(dummy)
                 
-                self.tree.addTopLevelItem(item)
+                cuentas.append(item)
             
-            # Expandir solo las cuentas (sin cargar subcarpetas aún)
-            for i in range(self.tree.topLevelItemCount()):
-                item = self.tree.topLevelItem(i)
-                # NO expandir automáticamente para evitar carga
-                # El usuario expandirá manualmente cuando lo necesite
+            # Las cuentas no se expanden automáticamente (evita cargar subcarpetas)
+            self.tree.addTopLevelItems(cuentas)
             
             QApplication.restoreOverrideCursor()
             
@@ -795,27 +995,21 @@ class DialogoBandejasOutlook(QDialog):
         """
         LAZY LOADING: Carga subcarpetas SOLO cuando el usuario expande un nodo
         """
-        # Obtener ID del item
-        item_id = item.data(0, Qt.UserRole + 1)
-        
-        # Si ya fue cargado, no hacer nada
-        if item_id in self.carpetas_cargadas:
+        # Obtener objeto de Outlook guardado en el item (None si ya se cargó)
+        carpeta_outlook = item.data(0, Qt.UserRole + 1)
+        if carpeta_outlook is None:
             return
         
-        # Marcar como cargado
-        self.carpetas_cargadas.add(item_id)
-        
-        # Obtener objeto de Outlook
-        carpeta_outlook = self.outlook_folders_map.get(item_id)
-        if not carpeta_outlook:
-            return
+        # Marcar como cargado: la referencia ya no hace falta
+        item.setData(0, Qt.UserRole + 1, None)
         
         try:
             QApplication.setOverrideCursor(Qt.WaitCursor)
+            # Sin repintados intermedios mientras se reemplazan los hijos
+            self.tree.setUpdatesEnabled(False)
             
             # Remover items dummy ("Cargando...")
-            while item.childCount() > 0:
-                item.removeChild(item.child(0))
+            item.takeChildren()
             
             # Obtener ruta acumulada
             ruta_acumulada = item.data(0, Qt.UserRole)
@@ -823,9 +1017,11 @@ class DialogoBandejasOutlook(QDialog):
             # Cargar subcarpetas de primer nivel (sin recursión)
             self._agregar_subcarpetas_primer_nivel(carpeta_outlook, item, ruta_acumulada)
             
+            self.tree.setUpdatesEnabled(True)
             QApplication.restoreOverrideCursor()
             
         except Exception as e:
+            self.tree.setUpdatesEnabled(True)
             QApplication.restoreOverrideCursor()
             # Mostrar error solo si es relevante
             if "permission" not in str(e).lower():
@@ -836,10 +1032,9 @@ class DialogoBandejasOutlook(QDialog):
         Agrega SOLO el primer nivel de subcarpetas (sin recursión)
         Cada subcarpeta tendrá su propio lazy loading
         """
+        hijos = []
         try:
-            for subcarpeta in carpeta_outlook.Folders:
-                nombre_subcarpeta = str(subcarpeta.Name)
-                
+            for nombre_subcarpeta, subcarpeta, tiene_subcarpetas in self._listar_carpetas(ruta_acumulada, carpeta_outlook):
                 # Construir ruta completa
                 ruta_completa = f"{ruta_acumulada}\\{nombre_subcarpeta}"
                 
@@ -853,24 +1048,47 @@ class DialogoBandejasOutlook(QDialog):
                 item_sub.setToolTip(1, ruta_completa)
                 
                 # Guardar referencia para lazy loading
-                item_id = id(item_sub)
-                self.outlook_folders_map[item_id] = subcarpeta
-                item_sub.setData(0, Qt.UserRole + 1, item_id)
+                item_sub.setData(0, Qt.UserRole + 1, subcarpeta)
                 
-                item_tree.addChild(item_sub)
+                hijos.append(item_sub)
                 
-                # Verificar si tiene subcarpetas (sin cargarlas)
-                try:
-                    if subcarpeta.Folders.Count > 0:
-                        # Agregar dummy para mostrar ➕
-                        dummy = QTreeWidgetItem(["⏳ Cargando...", ""])
-                        item_sub.addChild(dummy)
-                except:
-                    pass
+                if tiene_subcarpetas:
+                    # Agregar dummy para mostrar ➕
+                    dummy = QTreeWidgetItem(["⏳ Cargando...", ""])
+                    item_sub.addChild(dummy)
                     
         except Exception as e:
             # Carpetas inaccesibles se ignoran silenciosamente
             pass
+        
+        # Todas las subcarpetas se insertan de una vez
+        item_tree.addChildren(hijos)
+    
+    def _listar_carpetas(self, clave, padre_outlook):
+        """
+        Devuelve [(nombre, carpeta, tiene_subcarpetas)] de padre_outlook.Folders.
+        Solo la primera vez se enumera por COM (lento: cada acceso cruza al
+        proceso de Outlook); después se sirve desde la caché.
+        """
+        entradas = self.cache.get(clave)
+        if entradas is None:
+            entradas = []
+            for carpeta in padre_outlook.Folders:
+                # Verificar si tiene subcarpetas (sin cargarlas)
+                try:
+                    tiene_subcarpetas = carpeta.Folders.Count > 0
+                except:
+                    tiene_subcarpetas = False
+                entradas.append((str(carpeta.Name), carpeta, tiene_subcarpetas))
+            self.cache[clave] = entradas
+        return entradas
+    
+    def refrescar(self):
+        """Descarta las carpetas en caché y las vuelve a leer desde Outlook"""
+        self.cache.clear()
+        self.tree.clear()
+        self.label_ruta.setText("📍 Ruta seleccionada: (ninguna)")
+        self.cargar_bandejas_inicial()
     
     def _obtener_icono_carpeta(self, nombre):
         """Devuelve un icono según el nombre de la carpeta"""
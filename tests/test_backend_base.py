@@ -9,6 +9,7 @@ from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 from datetime import datetime
 import tempfile
+import threading
 import os
 import sys
 
@@ -75,7 +76,7 @@ class TestBackendBase(unittest.TestCase):
     
     def tearDown(self):
         """Limpieza después de cada test"""
-        pass
+        self.backend._cerrar_log()
     
     # ========================================
     # TESTS DE INICIALIZACIÓN
@@ -120,10 +121,10 @@ class TestBackendBase(unittest.TestCase):
         self.callback_progreso.assert_called_once_with(50, 100, 50.0)
     
     def test_actualizar_progreso_division_cero(self):
-        """Test: _actualizar_progreso maneja total=0"""
+        """Test: _actualizar_progreso con total=0 no invoca el callback"""
         self.backend._actualizar_progreso(0, 0)
         
-        self.callback_progreso.assert_called_once_with(0, 0, 0.0)
+        self.callback_progreso.assert_not_called()
     
     def test_cambiar_estado(self):
         """Test: _cambiar_estado actualiza estado y notifica"""
@@ -298,6 +299,43 @@ class TestBackendBase(unittest.TestCase):
             
             self.assertIn("Test mensaje", contenido)
     
+    def test_finalizar_log_cierra_archivo(self):
+        """Test: _finalizar_log_archivo cierra el handle y admite mensajes tardíos"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.backend._crear_log_archivo(tmpdir, "test_log")
+            self.backend._finalizar_log_archivo({'tiempo_total': 1.0})
+            
+            self.assertIsNone(self.backend._log_fp)
+            
+            self.backend._escribir_log("Mensaje tardío")
+            with open(self.backend.log_file, 'r', encoding='utf-8') as f:
+                contenido = f.read()
+            
+            self.assertIn("RESUMEN FINAL", contenido)
+            self.assertTrue(contenido.rstrip().endswith("Mensaje tardío"))
+    
+    def test_escribir_log_desde_varios_hilos(self):
+        """Test: _escribir_log no entremezcla líneas escritas desde varios hilos"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.backend._crear_log_archivo(tmpdir, "test_log")
+            
+            def escribir(n):
+                for i in range(200):
+                    self.backend._escribir_log(f"hilo{n}-{i}-" + "x" * 200)
+            
+            hilos = [threading.Thread(target=escribir, args=(n,)) for n in range(4)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            self.backend._cerrar_log()
+            
+            with open(self.backend.log_file, 'r', encoding='utf-8') as f:
+                lineas = [l for l in f.read().splitlines() if l.startswith("hilo")]
+            
+            self.assertEqual(len(lineas), 800)
+            self.assertTrue(all(l.endswith("x" * 200) for l in lineas))
+    
     # ========================================
     # TESTS DE FLUJO COMPLETO
     # ========================================
@@ -338,6 +376,34 @@ class TestBackendBase(unittest.TestCase):
         self.assertFalse(self.backend._event_cancelar.is_set())
         self.assertTrue(self.backend._event_pausa.is_set())
     
+    def test_verificar_pausa_espera_hasta_reanudar(self):
+        """Test: _verificar_pausa no bloquea sin pausa y espera mientras está pausado"""
+        self.backend._verificar_pausa()  # Sin pausa: retorna de inmediato
+        
+        self.backend._event_pausa.clear()
+        hilo = threading.Thread(target=self.backend._verificar_pausa)
+        hilo.start()
+        hilo.join(0.05)
+        self.assertTrue(hilo.is_alive())
+        
+        self.backend._event_pausa.set()
+        hilo.join(1)
+        self.assertFalse(hilo.is_alive())
+    
+    def test_resetear(self):
+        """Test: resetear vuelve al estado inicial conservando callbacks"""
+        callback = self.backend.callback_mensaje
+        self.backend.cancelar()
+        self.backend._cambiar_fase(FaseProceso.FINALIZACION)
+        
+        self.backend.resetear()
+        
+        self.assertEqual(self.backend.estado_actual, EstadoProceso.DETENIDO)
+        self.assertEqual(self.backend.fase_actual, FaseProceso.INICIAL)
+        self.assertFalse(self.backend._event_cancelar.is_set())
+        self.assertIsNone(self.backend.log_file)
+        self.assertIs(self.backend.callback_mensaje, callback)
+    
     # ========================================
     # TESTS DE REPRESENTACIÓN
     # ========================================
@@ -9,6 +9,7 @@ from unittest.mock import Mock, patch
 from pathlib import Path
 from datetime import datetime
 import tempfile
+import errno
 import shutil
 import sys
 
@@ -85,6 +86,14 @@ class TestClasificadorDocumentos(unittest.TestCase):
             self.assertFalse(es_valido)
             self.assertIn("carpeta", mensaje.lower())
     
+    def test_validar_parametros_sin_instancia(self):
+        """Test: validar_parametros puede llamarse sobre la clase"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            es_valido, mensaje = ClasificadorDocumentos.validar_parametros(tmpdir)
+            
+            self.assertTrue(es_valido)
+            self.assertEqual(mensaje, "")
+    
     # ========================================
     # TESTS DE ESTADÍSTICAS
     # ========================================
@@ -186,6 +195,24 @@ class TestClasificadorDocumentos(unittest.TestCase):
             self.assertEqual(self.clasificador.estadisticas.omitidos, 1)
             self.assertTrue(archivo.exists())  # No fue movido
     
+    def test_clasificar_archivo_filtro_previo_sin_coincidencia(self):
+        """Test: nombre que pasa el filtro previo ("firma") pero no coincide se omite"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archivo = Path(tmpdir) / "firma_digital.pdf"
+            archivo.touch()
+            
+            carpeta_firmados = Path(tmpdir) / "Firmados"
+            carpeta_sin_firmar = Path(tmpdir) / "Sin_Firmar"
+            carpeta_firmados.mkdir()
+            carpeta_sin_firmar.mkdir()
+            
+            resultado = self.clasificador._clasificar_archivo(
+                archivo, carpeta_firmados, carpeta_sin_firmar
+            )
+            
+            self.assertEqual(resultado, 'omitido')
+            self.assertTrue(archivo.exists())
+    
     def test_clasificar_prioridad_sin_firmar(self):
         """Test: _clasificar_archivo prioriza 'sin firmar' sobre 'firmado'"""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -234,6 +261,23 @@ class TestClasificadorDocumentos(unittest.TestCase):
             )
             self.assertEqual(resultado2, 'sin_firmar')
     
+    def test_clasificar_archivo_mayusculas(self):
+        """Test: _clasificar_archivo ignora mayúsculas/minúsculas"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archivo = Path(tmpdir) / "CONTRATO_SinFirmar.PDF"
+            archivo.touch()
+            
+            carpeta_firmados = Path(tmpdir) / "Firmados"
+            carpeta_sin_firmar = Path(tmpdir) / "Sin_Firmar"
+            carpeta_firmados.mkdir()
+            carpeta_sin_firmar.mkdir()
+            
+            resultado = self.clasificador._clasificar_archivo(
+                archivo, carpeta_firmados, carpeta_sin_firmar
+            )
+            
+            self.assertEqual(resultado, 'sin_firmar')
+    
     # ========================================
     # TESTS DE CONTROL DE FLUJO
     # ========================================
@@ -245,6 +289,17 @@ class TestClasificadorDocumentos(unittest.TestCase):
         self.assertTrue(self.clasificador.cancelado)
         self.assertEqual(self.clasificador.estado_actual, EstadoProceso.CANCELADO)
     
+    def test_resetear(self):
+        """Test: resetear limpia cancelación y estadísticas para reutilizar la instancia"""
+        self.clasificador.cancelar()
+        self.clasificador.estadisticas.firmados = 3
+        
+        self.clasificador.resetear()
+        
+        self.assertFalse(self.clasificador.cancelado)
+        self.assertEqual(self.clasificador.estadisticas.firmados, 0)
+        self.assertEqual(self.clasificador.estado_actual, EstadoProceso.DETENIDO)
+    
     def test_pausar_y_reanudar(self):
         """Test: pausar y reanudar funcionan (heredado de BackendBase)"""
         self.clasificador._cambiar_estado(EstadoProceso.EN_EJECUCION)
@@ -281,6 +336,22 @@ class TestClasificadorDocumentos(unittest.TestCase):
             self.assertTrue((Path(tmpdir) / "Documentos Firmados").exists())
             self.assertTrue((Path(tmpdir) / "Documentos sin Firmar").exists())
     
+    def test_clasificar_cancelado_cuenta_tareas_enviadas(self):
+        """Test: al cancelar se contabilizan los archivos que el pool ya movió"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(40):
+                (Path(tmpdir) / f"doc{i}_firmado.pdf").touch()
+            
+            # La primera revisión pasa; la siguiente (archivo 32) cancela
+            with patch.object(self.clasificador, '_verificar_pausa',
+                              side_effect=[None, InterruptedError("Cancelado")]):
+                resultado = self.clasificador.clasificar(tmpdir)
+            
+            movidos = len(list((Path(tmpdir) / "Documentos Firmados").iterdir()))
+            self.assertEqual(self.clasificador.estado_actual, EstadoProceso.CANCELADO)
+            self.assertGreater(movidos, 0)
+            self.assertEqual(resultado["firmados"], movidos)
+    
     def test_clasificar_carpeta_vacia(self):
         """Test: clasificar maneja carpeta vacía correctamente"""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -310,7 +381,7 @@ class TestClasificadorDocumentos(unittest.TestCase):
             carpeta_sin_firmar.mkdir()
             
             # Simular PermissionError
-            with patch('shutil.move', side_effect=PermissionError("Archivo bloqueado")):
+            with patch('os.replace', side_effect=PermissionError("Archivo bloqueado")):
                 resultado = self.clasificador._clasificar_archivo(
                     archivo, carpeta_firmados, carpeta_sin_firmar
                 )
@@ -318,6 +389,37 @@ class TestClasificadorDocumentos(unittest.TestCase):
             self.assertEqual(resultado, 'error')
             self.assertEqual(self.clasificador.estadisticas.errores, 1)
     
+    def test_mover_archivo_entre_unidades(self):
+        """Test: _mover_archivo recurre a shutil.move si el rename cruza unidades"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archivo = Path(tmpdir) / "documento_firmado.pdf"
+            archivo.touch()
+            
+            carpeta_firmados = Path(tmpdir) / "Firmados"
+            carpeta_firmados.mkdir()
+            
+            error_exdev = OSError(errno.EXDEV, "Cross-device link")
+            with patch('os.replace', side_effect=error_exdev):
+                self.clasificador._mover_archivo(archivo, carpeta_firmados)
+            
+            self.assertFalse(archivo.exists())
+            self.assertTrue((carpeta_firmados / "documento_firmado.pdf").exists())
+    
+    def test_mover_archivo_destino_existente(self):
+        """Test: _mover_archivo sobrescribe un archivo homónimo en el destino"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            archivo = Path(tmpdir) / "documento_firmado.pdf"
+            archivo.write_text("nuevo")
+            
+            carpeta_firmados = Path(tmpdir) / "Firmados"
+            carpeta_firmados.mkdir()
+            (carpeta_firmados / "documento_firmado.pdf").write_text("anterior")
+            
+            self.clasificador._mover_archivo(archivo, carpeta_firmados)
+            
+            self.assertFalse(archivo.exists())
+            self.assertEqual((carpeta_firmados / "documento_firmado.pdf").read_text(), "nuevo")
+    
     # ========================================
     # TESTS DE UTILIDADES HEREDADAS
     # ========================================
@@ -125,6 +125,39 @@ class TestExtractorAdjuntosOutlook(unittest.TestCase):
             # Debe haber enviado mensaje de warning
             self.callback_mensaje.assert_called()
     
+    # ========================================
+    # TESTS DE FILTRADO
+    # ========================================
+    
+    def test_filtro_rango_fechas(self):
+        """Test: _filtro_rango_fechas genera filtro DASL ISO con margen de un día"""
+        filtro = ExtractorAdjuntosOutlook._filtro_rango_fechas(
+            datetime(2025, 1, 10), datetime(2025, 1, 20, 23, 59, 59)
+        )
+        
+        campo = '"urn:schemas:httpmail:datereceived"'
+        self.assertTrue(filtro.startswith("@SQL="))
+        self.assertIn(f"{campo} >= '2025-01-09 00:00'", filtro)
+        self.assertIn(f"{campo} <= '2025-01-21 23:59'", filtro)
+    
+    def test_filas_tabla(self):
+        """Test: _filas_tabla lee solo las columnas configuradas de cada fila"""
+        fila = Mock()
+        fila.GetValues.return_value = ("ID1", "Asunto", datetime(2025, 1, 10), True)
+        tabla = MagicMock()
+        type(tabla).EndOfTable = property(Mock(side_effect=[False, True]))
+        tabla.GetNextRow.return_value = fila
+        tabla.GetRowCount.return_value = 1
+        carpeta = Mock()
+        carpeta.GetTable.return_value = tabla
+        
+        filas, total = self.extractor._filas_tabla(carpeta, "[ReceivedTime] >= '01/09/2025'")
+        
+        self.assertEqual(total, 1)
+        self.assertEqual(list(filas), [("ID1", "Asunto", datetime(2025, 1, 10), True)])
+        tabla.Columns.RemoveAll.assert_called_once()
+        self.assertEqual(tabla.Columns.Add.call_count, len(ExtractorAdjuntosOutlook.COLUMNAS_TABLA))
+    
     # ========================================
     # TESTS DE ESTADÍSTICAS
     # ========================================
@@ -210,6 +243,18 @@ class TestExtractorAdjuntosOutlook(unittest.TestCase):
             self.assertNotEqual(ruta, resultado)
             self.assertEqual(resultado.name, "test_1.txt")
     
+    def test_reservar_nombre(self):
+        """Test: _reservar_nombre usa el conjunto de nombres sin distinguir mayúsculas"""
+        carpeta = Path("destino")
+        self.extractor._nombres_destino = {"test.txt"}
+        
+        primero = self.extractor._reservar_nombre(carpeta, "TEST.txt")
+        segundo = self.extractor._reservar_nombre(carpeta, "test.txt")
+        
+        self.assertEqual(primero.name, "TEST_1.txt")
+        self.assertEqual(segundo.name, "test_2.txt")
+        self.assertIn("test_2.txt", self.extractor._nombres_destino)
+    
     # ========================================
     # TESTS DE EXCEL (específico del extractor)
     # ========================================
@@ -228,18 +273,8 @@ class TestExtractorAdjuntosOutlook(unittest.TestCase):
         with tempfile.TemporaryDirectory() as tmpdir:
             # Simular archivos descargados
             self.extractor.estadisticas.archivos_descargados = [
-                {
-                    'nombre': 'test1.pdf',
-                    'fecha_descarga': datetime.now(),
-                    'fecha_correo': '01/01/2025',
-                    'hora_correo': '10:00:00'
-                },
-                {
-                    'nombre': 'test2.pdf',
-                    'fecha_descarga': datetime.now(),
-                    'fecha_correo': '02/01/2025',
-                    'hora_correo': '11:00:00'
-                }
+                ('test1.pdf', datetime.now(), '01/01/2025', '10:00:00'),
+                ('test2.pdf', datetime.now(), '02/01/2025', '11:00:00')
             ]
             
             self.extractor._generar_excel_listado(tmpdir)
@@ -300,6 +335,22 @@ class TestExtractorIntegracion(unittest.TestCase):
         
         with self.assertRaises(ConnectionError):
             extractor._conectar_outlook()
+    
+    # Se parchea el módulo importado arriba (legacy.backend_extractor)
+    @patch('legacy.backend_extractor.pythoncom')
+    @patch('legacy.backend_extractor.win32com.client')
+    def test_descargar_en_paralelo_libera_com(self, mock_win32, mock_pythoncom):
+        """Test: cada hilo de descarga cierra su apartamento COM al terminar"""
+        extractor = ExtractorAdjuntosOutlook()
+        extractor._procesar_correo_por_id = Mock()
+        
+        extractor._descargar_en_paralelo(
+            [f"id{i}" for i in range(10)], Path(tempfile.gettempdir()), 3
+        )
+        
+        self.assertEqual(extractor.estadisticas.correos_procesados, 10)
+        self.assertEqual(mock_pythoncom.CoInitialize.call_count, 3)
+        self.assertEqual(mock_pythoncom.CoUninitialize.call_count, 3)
 
 
 # ========================================
@@ -5,6 +5,8 @@ Estilos CSS de PyQt5 para la aplicación.
 Proporciona temas claro y oscuro con el color corporativo #16A085 (verde turquesa).
 """
 
+import functools
+
 
 class Estilos:
     """
@@ -14,9 +16,11 @@ class Estilos:
     """
     
     @staticmethod
+    @functools.lru_cache(maxsize=4)
     def obtener_estilo(tema):
         """
         Obtiene el estilo CSS según el tema seleccionado.
+        El CSS de cada tema se construye una sola vez y se reutiliza.
         
         Args:
             tema (str): 'light' para tema claro, 'dark' para tema oscuro
@@ -82,14 +86,14 @@ class Estilos:
             QPushButton:disabled {
                 background-color: #BDC3C7;
             }
-            QLineEdit, QTextEdit, QDateEdit {
+            QLineEdit, QTextEdit, QPlainTextEdit, QDateEdit {
                 padding: 8px;
                 border: 2px solid #BDC3C7;
                 border-radius: 5px;
                 background-color: white;
                 selection-background-color: #16A085;
             }
-            QLineEdit:focus, QTextEdit:focus {
+            QLineEdit:focus, QTextEdit:focus, QPlainTextEdit:focus {
                 border: 2px solid #16A085;
             }
             QTabWidget::pane {
@@ -186,7 +190,7 @@ class Estilos:
             QPushButton:disabled {
                 background-color: #404040;
             }
-            QLineEdit, QTextEdit, QDateEdit {
+            QLineEdit, QTextEdit, QPlainTextEdit, QDateEdit {
                 padding: 8px;
                 border: 2px solid #404040;
                 border-radius: 5px;
@@ -194,7 +198,7 @@ class Estilos:
                 color: #E0E0E0;
                 selection-background-color: #16A085;
             }
-            QLineEdit:focus, QTextEdit:focus {
+            QLineEdit:focus, QTextEdit:focus, QPlainTextEdit:focus {
                 border: 2px solid #16A085;
             }
             QTabWidget::pane {